@@ -1,33 +1,39 @@
 import os
 import sys
 import json
+import logging
 import hashlib
+import sqlite3
 import zipfile
-import shutil
-import tempfile
-import mutagen
 
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTableWidget, QHeaderView, QFrame, QVBoxLayout, QWidget, QHBoxLayout, QVBoxLayout,
-                            QTableWidgetItem, QHBoxLayout, QWidget, QToolBar, QAction, QStyle, QPushButton, QMessageBox, QFileDialog)
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTableView, QAbstractItemView, QHeaderView, QFrame, QVBoxLayout, QWidget, QHBoxLayout, QVBoxLayout,
+                            QHBoxLayout, QWidget, QToolBar, QAction, QStyle, QPushButton, QMessageBox, QFileDialog)
 from PyQt5.QtCore import Qt, QThread, QEvent, QItemSelectionModel
-from PyQt5.QtGui import QBrush, QColor, QIcon, QPixmap, QKeySequence
+from PyQt5.QtGui import QIcon, QPixmap, QKeySequence
 
 from dialogs.Disambiguate import DisambiguateDialog
 from dialogs.Settings import SettingsDialog
 from dialogs.About import AboutDialog
+from dialogs.Diagnostics import DiagnosticsDialog
 
-from widgets.LockedCell import LockedCellWidget
-from widgets.FileBrowseCell import FileBrowseCellWidget
+from widgets.SongTableModel import SongTableModel, Cell
+from widgets.SongCellDelegate import SongCellDelegate
 from widgets.Progress import ProgressWidget
 
-from Workers import ExportWorker, ResetWorker, WriteWorker, LoadWorker
-from Helpers import col_to_key, resource_path, validate_path_rules, coerce_bool
+from Workers import ExportJob, ResetJob, WriteJob, LoadJob, ImportJob, JobQueue, PrefetchWorker, SourceValidator
+from SyncGroups import SyncGroups, SET_ORDER
+from PointerStore import PointerStore
+from SongCatalog import SongCatalog
+from Logs import get_logger, setup_logging
+from Helpers import col_to_key, resource_path, validate_path_rules, coerce_bool, split_zip_path
+
+log = get_logger("app")
 
 SETTINGS_FILE = "settings.json"
 BLANK_ROW = {'strings': {'title': '', 'album': '', 'artist': '', 'stream': ''}, 'source': ''}
 
 class SoundtrackViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, profile=False):
         super().__init__()
         self.setWindowTitle("Burnout Paradise Soundtrack Switcher")
         self.setWindowIcon(QIcon(resource_path("media/bpss.png")))
@@ -49,8 +55,17 @@ class SoundtrackViewer(QMainWindow):
         # establish important variables
         self.changes = False
         self.file = None
-        self.synced_cells = []  # List of lists of (row, column) tuples
-        self.defaults_file = resource_path("defaults.json")
+        self.profile = profile  # --profile: every load, apply and export runs under the profiler
+        self.sync_groups = SyncGroups()
+        self.selected_cells = set()  # (row, column) tuples, kept in step with the selection model
+        self.load_job = None  # background pointer scan, if one is running
+        self.scan_status = ""
+        self.scan_message = ""  # last thing the scan said it was doing
+        self.scan_error = None  # why the last scan ended without pointers, if it did
+        self.scan_again = False  # a scan was asked for while one was running
+        self.dirty_rows = set()  # rows edited since their saved form was last built
+        self.saved_rows = {}  # row -> data written to the soundtrack file, None if the row is stock
+        self.source_hashes = {}  # source path -> hash recorded in the loaded soundtrack
 
         # Create toolbar
         self.create_toolbar()
@@ -65,15 +80,25 @@ class SoundtrackViewer(QMainWindow):
         if not self.validate_settings():
             dialog = SettingsDialog(first=True)
             if dialog.exec_():
-                print("First time settings updated")
+                log.info("First time settings updated")
                 # force a reload of settings
                 self.settings = self.load_settings()
             else:
-                print("Settings canceled")
+                log.info("Settings canceled")
                 QMessageBox.warning(self, "Missing Input", "You will be unable to apply new soundtracks until you set all settings.")
         
-        # Load defaults
-        self.defaults = self.load_defaults()
+        # Load defaults, shared with the processing code
+        self.catalog = SongCatalog.load()
+        self.defaults = self.catalog.songs
+
+        # Check sources as they are picked so Apply does not have to
+        self.validator = SourceValidator()
+
+        # Load, apply, export and friends all run here
+        self.jobs = JobQueue()
+
+        # Warm the SX cache in the background while the user edits
+        self.start_prefetch()
 
         # Create table widget
         self.create_table()
@@ -95,11 +120,46 @@ class SoundtrackViewer(QMainWindow):
             self.settings["actions"] = False
             self.write_settings()
     
+    def start_prefetch(self):
+        self.prefetch_thread = QThread()
+        self.prefetch_worker = PrefetchWorker(self.settings)
+        self.prefetch_worker.moveToThread(self.prefetch_thread)
+        self.prefetch_thread.started.connect(self.prefetch_worker.run)
+        self.prefetch_worker.finished.connect(self.prefetch_thread.quit)
+        self.prefetch_thread.start(QThread.LowestPriority)
+
+    def prefetch_source(self, row, source):
+        source = (source or "").strip()
+        self.validator.probe(source)
+        self.prefetch_worker.enqueue(row, source, self.source_hashes.get(source))
+
+    def closeEvent(self, event):
+        # background scans just start over next time; anything else is worth asking about
+        unfinished = self.jobs.unfinished()
+        if unfinished and QMessageBox.question(
+            self,
+            "Still Working",
+            f"BPSS is still {' and '.join(sorted({job.label for job in unfinished}))}. Closing now cancels it, "
+            "and an apply or unapply that is cut short can leave the game partly changed.\n\nClose anyway?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        ) != QMessageBox.Yes:
+            event.ignore()
+            return
+        self.validator.shutdown()
+        PointerStore.flush_all()
+        self.prefetch_worker.stop()
+        self.prefetch_thread.quit()
+        self.prefetch_thread.wait()
+        self.jobs.shutdown()
+        super().closeEvent(event)
+
     def update_window_title(self):
         base = "Burnout Paradise Soundtrack Switcher"
         file = f"[{self.file}]" if self.file else ""
         change = "*" if self.changes else ""
-        self.setWindowTitle(f"{base} {file} {change}")
+        scan = f"({self.scan_status})" if self.scan_status else ""
+        self.setWindowTitle(f"{base} {file} {change} {scan}")
     
     def load_settings(self):
         if os.path.exists(SETTINGS_FILE):
@@ -108,6 +168,8 @@ class SoundtrackViewer(QMainWindow):
                 settings["warn"] = coerce_bool(settings.get("warn", True), default=True)
                 settings["mod"] = coerce_bool(settings.get("mod", False), default=False)
                 settings["actions"] = coerce_bool(settings.get("actions", False), default=False)
+                settings["embed"] = coerce_bool(settings.get("embed", False), default=False)
+                settings["profile"] = coerce_bool(settings.get("profile", False), default=False)
                 return settings
         return {}
     
@@ -115,12 +177,6 @@ class SoundtrackViewer(QMainWindow):
         with open(SETTINGS_FILE, "w") as f:
             json.dump(self.settings, f, indent=4)
     
-    def load_defaults(self):
-        if os.path.exists(self.defaults_file):
-            with open(self.defaults_file, "r") as f:
-                return json.load(f)
-        return {}
-
     def validate_settings(self):
         required_keys = [
             "game",
@@ -211,14 +267,19 @@ class SoundtrackViewer(QMainWindow):
         settings_action.triggered.connect(self.show_settings)
         toolbar.addAction(settings_action)
         
+        diagnostics_action = QAction(self.style().standardIcon(QStyle.SP_FileDialogInfoView), "Diagnostics", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        toolbar.addAction(diagnostics_action)
+
         about_action = QAction(self.style().standardIcon(QStyle.SP_MessageBoxQuestion), "About", self)
         about_action.triggered.connect(self.show_about)
         toolbar.addAction(about_action)
 
     def create_table(self):
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["#", "Title", "Album", "Artist", "Stream", "Source"])
+        self.table = QTableView()
+        self.model = SongTableModel(self.table)
+        self.table.setModel(self.model)
+        self.table.setItemDelegate(SongCellDelegate(self.table))
         
         # Hide vertical headers (row numbers on the left)
         self.table.verticalHeader().setVisible(False)
@@ -226,289 +287,173 @@ class SoundtrackViewer(QMainWindow):
         # Enable sorting
         self.table.setSortingEnabled(False)
 
+        # Accept audio files dropped onto source cells
+        self.table.setAcceptDrops(True)
+        self.table.setDragDropMode(QAbstractItemView.DropOnly)
+        self.table.setDropIndicatorShown(False)
+
         # Load table with data
         self.load_data()
         
         # set up item syncing
-        self.table.itemChanged.connect(self.handle_item_changed)
+        self.model.itemChanged.connect(self.handle_item_changed)
+        self.model.sourceChanged.connect(self.handle_source_changed)
+
+        # set up the actions pane for selected cells
+        self.table.selectionModel().selectionChanged.connect(self.handle_selection_changed)
+        self.model.modelReset.connect(self.selected_cells.clear)
 
-        # set up highlighting of locked cells
-        self.table.itemSelectionChanged.connect(self.handle_selection_changed)
+    def get_pointer_store(self):
+        return PointerStore.open(str(self.get_ptrs_hash()))
 
     def load_data(self):
-        # Check for JSON data
-        filename = str(self.get_ptrs_hash()) + ".json"
-        if os.path.isfile(filename):
-            self.fill_table()
-        else:
-            print(f"Generating new ptrs for {filename}")
-            
-            self.progress = ProgressWidget("Finding pointers...")
-            self.progress.show()
-            
-            self.thread = QThread()
-            self.progress.worker_thread = self.thread
-            self.worker = LoadWorker(self.settings, filename)
-            self.worker.moveToThread(self.thread)
-
-            # Connect signals
-            self.thread.started.connect(self.worker.run)
-            self.worker.progress_changed.connect(self.progress.set_progress)
-            self.thread.finished.connect(self.progress.close)
-            self.worker.finished.connect(self.thread.quit)
-            self.worker.finished.connect(self.worker.deleteLater)
-            self.worker.finished.connect(self.fill_table)
-            self.thread.finished.connect(self.thread.deleteLater)
-
-            self.worker.error.connect(self.handle_load_exception)
-            
-            self.thread.start()
+        # the table is usable right away; without pointers it starts from the stock strings
+        self.fill_table()
+        if not self.get_pointer_store().exists():
+            self.scan_pointers()
+
+    def scan_pointers(self):
+        if self.load_job:
+            # the running scan checks for the current pointers file when it finishes
+            self.scan_again = True
+            return
+        filename = str(self.get_ptrs_hash())
+        log.info("Generating new ptrs for %s", filename)
+        self.scan_filename = filename
+        self.scan_error = None
+        self.scan_again = False
+        self.set_scan_progress(0, "Finding pointers...")
+
+        self.load_job = LoadJob(self.settings, filename)
+        self.load_job.profile = self.take_profile_request()
+        self.load_job.progress_changed.connect(self.set_scan_progress)
+        self.load_job.finished.connect(self.hydrate_table)
+        self.load_job.error.connect(self.handle_load_exception)
+        self.jobs.submit(self.load_job)
+
+    def take_profile_request(self):
+        # the Settings toggle only covers the next profiled job
+        if self.settings.get("profile", False):
+            self.settings["profile"] = False
+            self.write_settings()
+            return True
+        return self.profile
+
+    def start_job(self, job, title, handle_exception):
+        if job.profiled:
+            job.profile = self.take_profile_request()
+        self.progress = ProgressWidget(title)
+        self.progress.job = job
+        self.progress.show()
+
+        job.progress_changed.connect(self.progress.set_progress)
+        job.eta_changed.connect(self.progress.set_eta)
+        job.finished.connect(self.progress.close)
+        job.error.connect(handle_exception)
+        self.jobs.submit(job)
+
+    def set_scan_progress(self, val, status):
+        if status:
+            self.scan_message = status
+        self.scan_status = f"{status} {val}%" if status else f"{val}%"
+        self.update_window_title()
+
+    def hydrate_table(self):
+        job = self.load_job
+        self.load_job = None
+        self.scan_status = ""
+
+        filename = str(self.get_ptrs_hash())
+        try:
+            store = PointerStore.open(filename)
+            if not store.exists():
+                # settings changed while scanning, so that scan says nothing about these
+                if filename != self.scan_filename or self.scan_again:
+                    self.scan_pointers()
+                    return
+                # the scan gave up (bad game path, YAP failing) or was canceled; the
+                # reason stays in the title until a new scan starts from Apply or Settings
+                if not job.is_canceled():
+                    self.scan_error = self.scan_error or self.scan_message
+                    self.scan_status = f"Pointers not found: {self.scan_error}"
+                    log.warning("Pointer scan for %s ended without pointers: %s", filename, self.scan_error)
+                self.update_window_title()
+                return
+            self.update_window_title()
+            ptrs = store.songs()
+            # colors, locks and overrides are laid over what is already in the table
+            self.sync_groups = SyncGroups.from_pointers(ptrs)
+            self.model.set_sync(self.sync_groups, [entry.get("overrides", {}) for entry in ptrs.values()])
+            self.handle_selection_changed()
+        except sqlite3.DatabaseError as e:
+            QMessageBox.critical(self, "Critical Error", f"Fill Error: Pointers file \"{self.get_ptrs_hash()}.db\" is damaged ({e}). Delete it and reopen BPSS to regenerate pointers.")
+        except Exception as e:
+            QMessageBox.critical(self, "Critical Error", f"Fill Error: {e}")
 
     def fill_table(self):
         try:
             self.settings = self.load_settings()
             if not self.get_ptrs_hash():
                 return
-            filename = self.get_ptrs_hash() + ".json"
-            with open(filename, "r") as file:
-                ptrs = json.load(file)
+            store = self.get_pointer_store()
+            if store.exists():
+                ptrs = store.songs()
+            else:
+                # pointers are still being found, start from the stock strings
+                ptrs = {key: {"strings": dict(value["defaults"])} for key, value in self.defaults.items()}
 
-            # Set row count based on number of entries
-            self.table.setRowCount(len(ptrs))
+            self.prefetch_worker.clear()
             
-            stock = {}
-            backfill = []
-            sync = {}
+            rows = []
+            sync = SyncGroups.from_pointers(ptrs)
+
+            # if this is BurnoutPR, don't show cut songs
+            index_flag = "BurnoutPR" in self.settings.get("game", "") and not self.settings.get("mod", False)
             
             # Populate table
-            for row_index, (key, entry) in enumerate(ptrs.items()):
-                # if this is BurnoutPR, don't show cut songs
-                if "BurnoutPR" in self.settings.get("game", "") and not self.settings.get("mod", False):
-                    self.table.setRowHidden(24, True)
-                    self.table.setRowHidden(25, True)
-                    index_flag = True
-                else:
-                    self.table.setRowHidden(24, False)
-                    self.table.setRowHidden(25, False)
-                    index_flag = False
-
+            for row_index, entry in enumerate(ptrs.values()):
                 # Get strings data (title, stream, album, artist)
                 strings = entry.get("strings", {})
-                title = strings.get("title", "")
-                album = strings.get("album", "")
-                artist = strings.get("artist", "")
-                stream = strings.get("stream", "")
                 
                 # Get override data
                 overrides = entry.get("overrides", {})
                 
-                # Create index item with proper numeric sorting
-                index_item = QTableWidgetItem()
+                # Index cell holds a number so it sorts numerically
                 final_index = row_index + 1 if (not (index_flag and row_index >= 26)) else row_index - 1
-                index_item.setData(Qt.DisplayRole, final_index)  # Store as number for sorting
-                index_item.setFlags(index_item.flags() & ~Qt.ItemIsEditable)
-                index_item.setTextAlignment(Qt.AlignCenter)
 
-                # Create file browse widget with update hook
-                file_browse_widget = FileBrowseCellWidget("")
-                file_browse_widget.textChanged.connect(self.handle_source_changed)
-                
-                match self.defaults[key]["type"]:
-                    case 0: # regular soundtrack
-                        match self.defaults[key]["lock"]:
-                            case 0: # no lock
-                                self.table.setItem(row_index, 0, index_item)
-                                self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                                self.table.setItem(row_index, 2, QTableWidgetItem(album))
-                                self.table.setItem(row_index, 3, QTableWidgetItem(artist))
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-                            case 1: # no album (FRICTION)
-                                album_ptrs = entry.get("ptrs").get("album")
-                                if len(album_ptrs) > 1:
-                                    stock[album] = album_ptrs[1:]
-                                    album_color = len(sync)
-                                    sync[self.defaults[key]["defaults"]["album"]] = [(row_index, 2)]
-                                    self.table.setItem(row_index, 2, self.make_unique_cell(album, album_color))
-                                    if overrides.get("album"):
-                                        self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, album_color, overrides.get("album")))
-                                elif len(album_ptrs) == 0:
-                                    backfill.append([row_index, 2, key, 0])
-                                else:
-                                    self.table.setItem(row_index, 2, QTableWidgetItem(album)) # false alarm, no need for synced cell
-                                
-                                self.table.setItem(row_index, 0, index_item)
-                                self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                                # look above for album cell
-                                self.table.setItem(row_index, 3, QTableWidgetItem(artist))
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-                            case 3: # artist/album sync
-                                self.table.setItem(row_index, 0, index_item)
-                                self.table.setItem(row_index, 1, QTableWidgetItem(title))
-
-                                sync[self.defaults[key]["defaults"]["album"]] = [(row_index, 2), (row_index, 3)]
-                                song_color = list(sync).index(self.defaults[key]["defaults"]["album"])
-                                if overrides.get("album"):
-                                    self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, song_color, overrides.get("album")))
-                                else:
-                                    self.table.setItem(row_index, 2, self.make_unique_cell(album, song_color))
-                                
-                                if overrides.get("artist"):
-                                    self.table.setItem(row_index, 3, self.make_disambiguated_cell(artist, song_color, overrides.get("artist")))
-                                else:
-                                    self.table.setItem(row_index, 3, self.make_unique_cell(artist, song_color))
-
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-                            case 6: # stream/artist sync
-                                self.table.setItem(row_index, 0, index_item)
-                                self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                                self.table.setItem(row_index, 2, QTableWidgetItem(album))
-                                if overrides.get("artist"):
-                                    self.table.setItem(row_index, 3, self.make_disambiguated_cell(artist, artist, overrides.get("artist")))
-                                else:
-                                    self.table.setCellWidget(row_index, 3, LockedCellWidget(artist))
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-                            case 7: # stream/artist/album sync
-                                self.table.setItem(row_index, 0, index_item)
-                                self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                                if overrides.get("album"):
-                                    self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, album, overrides.get("album")))
-                                else:
-                                    self.table.setCellWidget(row_index, 2, LockedCellWidget(album))
-                                if overrides.get("artist"):
-                                    self.table.setItem(row_index, 3, self.make_disambiguated_cell(artist, artist, overrides.get("artist")))
-                                else:
-                                    self.table.setCellWidget(row_index, 3, LockedCellWidget(artist))
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-
-                            case 9: # song/album sync                               
-                                self.table.setItem(row_index, 0, index_item)
-
-                                sync[self.defaults[key]["defaults"]["title"]] = [(row_index, 1), (row_index, 2)]
-                                song_color = list(sync).index(self.defaults[key]["defaults"]["title"])
-                                
-                                if overrides.get("title"):
-                                    self.table.setItem(row_index, 1, self.make_disambiguated_cell(title, song_color, overrides.get("title")))
-                                else:
-                                    self.table.setItem(row_index, 1, self.make_unique_cell(title, song_color))
-                                
-                                if overrides.get("album"):
-                                    self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, song_color, overrides.get("album")))
-                                else:
-                                    self.table.setItem(row_index, 2, self.make_unique_cell(album, song_color))
-
-                                self.table.setItem(row_index, 3, QTableWidgetItem(artist))
-                                self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                                self.table.setCellWidget(row_index, 5, file_browse_widget)
-
-                    case 1: # burnout soundtrack
-                        # steal any duplicate strings
-                        artist_ptrs = entry.get("ptrs").get("artist")
-                        if len(artist_ptrs) > 1:
-                            stock[artist] = artist_ptrs[1:]
-                            sync[self.defaults[key]["defaults"]["artist"]] = [(row_index, 3)]
-                            artist_color = list(sync).index(self.defaults[key]["defaults"]["artist"])
-                            artist_item = self.make_unique_cell(artist, artist_color)
-                            if overrides.get("artist"):
-                                artist_item = self.make_disambiguated_cell(artist, artist_color, overrides.get("artist"))
-                            self.table.setItem(row_index, 3, artist_item)
-                                
-                        elif len(artist_ptrs) == 0:
-                            backfill.append([row_index, 3, key, 1])
-                        else:
-                            self.table.setItem(row_index, 3, QTableWidgetItem(artist))
-                        
-                        album_ptrs = entry.get("ptrs").get("album")
-                        if len(album_ptrs) > 1:
-                            stock[album] = album_ptrs[1:]
-                            sync[self.defaults[key]["defaults"]["album"]] = [(row_index, 2)]
-                            album_color = list(sync).index(self.defaults[key]["defaults"]["album"])
-                            self.table.setItem(row_index, 2, self.make_unique_cell(album, album_color))
-                            if overrides.get("album"):
-                                self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, album_color, overrides.get("album")))
-                                
-                        elif len(album_ptrs) == 0:
-                            backfill.append([row_index, 2, key, 0])
-                        else:
-                            self.table.setItem(row_index, 2, QTableWidgetItem(album))
-                            
-                        self.table.setItem(row_index, 0, index_item)
-                        self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                        # look above for album cell
-                        # look above for artist cell
-                        self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                        self.table.setCellWidget(row_index, 5, file_browse_widget)  # Ensure source is never None 
-                    case 2: # classical soundtrack
-                        # steal any duplicate strings
-                        artist_ptrs = entry.get("ptrs").get("artist")
-                        if len(artist_ptrs) > 1:
-                            stock[artist] = artist_ptrs[1:]
-                            sync[self.defaults[key]["defaults"]["artist"]] = [(row_index, 3)]
-                            artist_color = list(sync).index(self.defaults[key]["defaults"]["artist"])
-                            artist_item = self.make_unique_cell(artist, artist_color)
-                            if overrides.get("artist"):
-                                artist_item = self.make_disambiguated_cell(artist, artist_color, overrides.get("artist"))
-                            self.table.setItem(row_index, 3, artist_item)
-                                
-                        elif len(artist_ptrs) == 0:
-                            backfill.append([row_index, 3, key, 3])
-                        else:
-                            self.table.setItem(row_index, 3, QTableWidgetItem(artist))
-                        
-                        album_ptrs = entry.get("ptrs").get("album")
-                        if len(album_ptrs) > 1:
-                            stock[album] = album_ptrs[1:]
-                            sync[self.defaults[key]["defaults"]["album"]] = [(row_index, 2)]
-                            album_color = list(sync).index(self.defaults[key]["defaults"]["album"])
-                            self.table.setItem(row_index, 2, self.make_unique_cell(album, album_color))
-                            if overrides.get("album"):
-                                self.table.setItem(row_index, 2, self.make_disambiguated_cell(album, album_color, overrides.get("album")))
-                                
-                        elif len(album_ptrs) == 0:
-                            backfill.append([row_index, 2, key, 0])
-                        else:
-                            self.table.setItem(row_index, 2, QTableWidgetItem(album))
-
-                        self.table.setItem(row_index, 0, index_item)
-                        self.table.setItem(row_index, 1, QTableWidgetItem(title))
-                        # look above for album cell
-                        # look above for artist cell
-                        self.table.setCellWidget(row_index, 4, LockedCellWidget(stream))
-                        self.table.setCellWidget(row_index, 5, file_browse_widget)  # Ensure source is never None
-
-            # backfill
-            for i in backfill:
-                column = col_to_key(i[1])
-                default_value = self.defaults[i[2]]["defaults"][column]
-                sync[default_value].append((i[0], i[1]))
-                stock[default_value].pop()
-                unique_color = list(sync).index(default_value)
-                self.table.setItem(i[0], i[1], self.make_unique_cell(default_value, unique_color))
-                if ptrs[i[2]].get("overrides") and ptrs[i[2]]["overrides"].get(column):
-                    self.table.setItem(i[0], i[1], self.make_disambiguated_cell(default_value, unique_color, ptrs[i[2]]["overrides"].get(column)))   
+                # shared strings are colored by group, or locked if they double as the stream name
+                cells = [Cell(final_index)]
+                for col in range(1, 4):
+                    field = col_to_key(col)
+                    cell = (row_index, col)
+                    cells.append(Cell(strings.get(field, ""), locked=sync.is_locked(cell), color=sync.color(cell), override=overrides.get(field)))
+                cells.append(Cell(strings.get("stream", ""), locked=True))
+                cells.append(Cell(""))
+                rows.append(cells)
+
+            self.model.set_cells(rows)
+            self.dirty_rows = set(range(len(rows)))
+            self.saved_rows = {}
+            self.table.setRowHidden(24, index_flag)
+            self.table.setRowHidden(25, index_flag)
 
             # populate table sync
-            for k in sync.keys():
-                self.synced_cells.append(sync[k])
+            self.sync_groups = sync
             
             # fix column sizes
             self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
             self.table.setColumnWidth(0, 30)  # Set to 30 pixels wide
 
-            for col in range(1, self.table.columnCount()):
+            for col in range(1, self.model.columnCount()):
                 self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.Stretch)
 
             self.changes = False
             self.update_window_title()
         
         except FileNotFoundError:
-            QMessageBox.critical(self, "Critical Error", f"Fill Error: Pointers file \"{self.get_ptrs_hash()}.json\" not found. Try pressing Reset.")
-        except json.JSONDecodeError:
-            QMessageBox.critical(self, "Critical Error", f"Fill Error: Invalid JSON in \"{self.get_ptrs_hash()}.json\". Try pressing Reset.")
+            QMessageBox.critical(self, "Critical Error", f"Fill Error: Pointers file \"{self.get_ptrs_hash()}.db\" not found. Try pressing Reset.")
+        except sqlite3.DatabaseError as e:
+            QMessageBox.critical(self, "Critical Error", f"Fill Error: Pointers file \"{self.get_ptrs_hash()}.db\" is damaged ({e}). Delete it and reopen BPSS to regenerate pointers.")
         except Exception as e:
             QMessageBox.critical(self, "Critical Error", f"Fill Error: {e}")
     
@@ -522,12 +467,17 @@ class SoundtrackViewer(QMainWindow):
                     st = json.load(file)
 
                 # Edit table
+                self.prefetch_worker.clear()
+                self.source_hashes = {}
                 for (key, entry) in st.items():
-                    row_index = list(self.defaults.keys()).index(key)
+                    row_index = self.catalog.row(key)
                     self.set_table_row(row_index, entry)
                     # Hack to handle zip source paths
                     if "zip" in entry.keys():
-                        self.table.cellWidget(row_index, 5).setText(entry.get("zip", ""))
+                        self.model.set_text(row_index, 5, entry.get("zip", ""))
+                    if entry.get("hash"):
+                        self.source_hashes[self.model.text(row_index, 5)] = entry["hash"]
+                    self.prefetch_source(row_index, self.model.text(row_index, 5))
             
         except FileNotFoundError:
             QMessageBox.critical(self, "Critical Error", f"Load Error: Pointers file \"{self.file}\" not found.")
@@ -542,31 +492,21 @@ class SoundtrackViewer(QMainWindow):
         if not output_path:
             return False
 
-        rows = self.table.rowCount()
+        # only rows edited since the last save are rebuilt
+        for r in self.dirty_rows:
+            self.saved_rows[r] = self.build_saved_row(r)
+        self.dirty_rows.clear()
 
         out = {}
-        for r in range(rows):
-            save = False
-            default = self.defaults[list(self.defaults.keys())[r]]
-            row_data = self.get_table_row(r)
-            source_path = (row_data.get("source", "") or "").strip()
-            row_data["source"] = source_path
-            
-            for key, value in row_data["strings"].items():
-                if value != default["defaults"][key]:
-                    save = True
-
-            # Keep rows with custom source files even when metadata still matches defaults.
-            if source_path:
-                save = True
-
+        for r, row_data in sorted(self.saved_rows.items()):
+            if row_data is None:
+                continue
+            source_path = row_data["source"]
             if export:
                 # convert source to relative path at "zip" if exporting
                 if source_path:
-                    row_data["zip"] = os.path.join("soundtracks", os.path.splitext(os.path.basename(output_path))[0], os.path.basename(source_path))
-            
-            if save:
-                out[list(self.defaults.keys())[r]] = row_data
+                    row_data = dict(row_data, zip=os.path.join("soundtracks", os.path.splitext(os.path.basename(output_path))[0], os.path.basename(source_path)))
+            out[self.catalog.keys[r]] = row_data
         
         try:
             with open(output_path, "w", encoding="utf-8") as file:
@@ -587,113 +527,60 @@ class SoundtrackViewer(QMainWindow):
             )
         return False
     
-    def make_unique_cell(self, text, color) -> QTableWidgetItem:
-        colors = [
-            "#A8E6A1",  # pastel forest green (replacing pastel red)
-            "#FFDFBA",  # pastel orange
-            "#FFFFBA",  # pastel yellow
-            "#BAFFC9",  # pastel green
-            "#BAE1FF",  # pastel blue
-            "#E3BAFF",  # pastel purple
-            "#FFCCE5",  # pastel pink
-            "#CCFFEE",  # mint
-            "#FFD0AA",  # pastel peach
-            "#FFF0BA",  # light gold
-            "#FFD1DC",  # cotton candy pink
-            "#C5E1A5",  # light lime
-            "#F8BBD0",  # light rose
-            "#D1C4E9",  # lavender
-            "#B3E5FC"   # baby blue
-        ]
+    def build_saved_row(self, r):
+        save = False
+        default = self.defaults[self.catalog.keys[r]]
+        row_data = self.get_table_row(r)
+        source_path = (row_data.get("source", "") or "").strip()
+        row_data["source"] = source_path
+        
+        for key, value in row_data["strings"].items():
+            if value != default["defaults"][key]:
+                save = True
 
-        widget = QTableWidgetItem(text)
-        if isinstance(color, int):
-            widget.setBackground(QBrush(QColor(colors[color])))
-        else:
-            widget.setBackground(color)
-        return widget
-    
-    def make_disambiguated_cell(self, text, prev_color, override) -> QTableWidgetItem:
-        widget = QTableWidgetItem(QIcon(resource_path("media/star.png")), text)
-        widget.disambiguated = True
-        widget.prev_color = prev_color
-        widget.setToolTip(str(override))
-        return widget
-
-    def handle_item_changed(self, changed_item: QTableWidgetItem):
+        # Keep rows with custom source files even when metadata still matches defaults.
+        if source_path:
+            save = True
+            if split_zip_path(source_path) and source_path in self.source_hashes:
+                row_data["hash"] = self.source_hashes[source_path]
+
+        return row_data if save else None
+
+    def handle_item_changed(self, row, col, text):
+        self.dirty_rows.add(row)
         self.changes = True
         self.update_window_title()
-        row = changed_item.row()
-        col = changed_item.column()
-        text = changed_item.text()
 
         # handle synced cells
-        for group in self.synced_cells:
-            if (row, col) in group and not hasattr(self.get_item_or_cellwidget(row, col), "disambiguated"):
-                for (r, c) in group:
-                    if (r, c) != (row, col) and not hasattr(self.get_item_or_cellwidget(r, c), "disambiguated"):
-                        self.get_item_or_cellwidget(r, c).setText(text)
-                break  # Only one group per cell
-
-    def handle_source_changed(self, _text):
+        if not self.model.cell(row, col).disambiguated:
+            for (r, c) in self.sync_groups.group((row, col)):
+                if (r, c) != (row, col) and not self.model.cell(r, c).disambiguated:
+                    self.model.set_text(r, c, text)
+
+    def handle_source_changed(self, row, text):
+        self.dirty_rows.add(row)
         self.changes = True
         self.update_window_title()
-
-    def handle_selection_changed(self):
-        selected = self.table.selectedIndexes()
-        # handle selection and de-selection of cellwidgets with a full table sweep
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                widget = self.table.cellWidget(row, col)
-                if isinstance(widget, LockedCellWidget):
-                    if any(index.row() == row and index.column() == col for index in selected):
-                        widget.setSelected(True)
-                    else:
-                        widget.setSelected(False)
+        self.prefetch_source(row, text)
+
+    def handle_selection_changed(self, selected=None, deselected=None):
+        # only apply what changed; the view repaints just those cells
+        if selected is not None:
+            for index in deselected.indexes():
+                self.selected_cells.discard((index.row(), index.column()))
+            for index in selected.indexes():
+                self.selected_cells.add((index.row(), index.column()))
         # show/hide disambiguate button if actions pane is open
         if self.actions:
             self.disambiguate_btn.hide()
             self.undisambiguate_btn.hide()
-            if len(selected) == 1:
-                cell = selected[0]
-                if self.is_disambiguatable(cell):
+            if len(self.selected_cells) == 1:
+                (row, col) = next(iter(self.selected_cells))
+                if self.sync_groups.is_disambiguatable((row, col)):
                     self.disambiguate_btn.show()
-                if hasattr(self.get_item_or_cellwidget(cell.row(), cell.column()), "disambiguated"):
+                if self.model.cell(row, col).disambiguated:
                     self.undisambiguate_btn.show()
 
-    def is_disambiguatable(self, cell):
-        row = cell.row()
-        col = cell.column()
-        key = list(self.defaults.keys())[row]
-        match self.defaults[key]["type"]:
-            case 0: # regular soundtrack
-                match self.defaults[key]["lock"]:
-                    case 1:
-                        if col == 2:
-                            return True
-                    case 3:
-                        if col == 2 or col == 3:
-                            return True
-                    case 6:
-                        if col == 3:
-                            return True
-                    case 7:
-                        if col == 2 or col == 3:
-                            return True
-                    case 9:
-                        if col == 1 or col == 2:
-                            return True
-            case 1: # burnout soundtrack
-                if col == 2 or col == 3:
-                    return True
-            case 2: # classical soundtrack
-                if col == 2:
-                    return True
-                elif col == 3:
-                    if self.defaults[key]["lock"] == 1:
-                        return True
-
-
     def create_actions(self):
         # Right side - actions panel (takes 1/3 of space)
         actions_frame = QFrame()
@@ -761,14 +648,14 @@ class SoundtrackViewer(QMainWindow):
     
     # Toolbar action methods (placeholder implementations)
     def new_file(self):
-        print("New file action triggered")
+        log.info("New file action triggered")
         self.file = None
         self.load_data()
         self.changes = False
         self.update_window_title()
         
     def open_file(self):
-        print("Load file action triggered")
+        log.info("Load file action triggered")
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Open File",
@@ -782,70 +669,26 @@ class SoundtrackViewer(QMainWindow):
             return
 
         if file_path.lower().endswith(".zip"):
-            self.progress = ProgressWidget("Opening...")
-            self.progress.show()
-            self.progress.set_progress(100, "Opening zip file...")
-            soundtracks_dir = "soundtracks"
-            zip_name = os.path.splitext(os.path.basename(file_path))[0]
-            final_dir = os.path.join(soundtracks_dir, zip_name)
-            temp_dir = None
-            soundtrack_member = None
-
-            try:
-                with zipfile.ZipFile(file_path, "r") as z:
-                    zip_entries = [
-                        name.replace("\\", "/").lstrip("./")
-                        for name in z.namelist()
-                        if not name.endswith("/")
-                    ]
-                    candidates = [
-                        name for name in zip_entries
-                        if "/" not in name and name.lower().endswith(".soundtrack")
-                    ]
-
-                    if not candidates:
-                        QMessageBox.critical(self, "Unable to open zip file", f"Error: \"{os.path.basename(file_path)}\" does not contain a valid .soundtrack file.")
-                        print("Zip doesn't contain a .soundtrack file in root directory")
-                        return
-
-                    soundtrack_member = candidates[0]
-
-                    os.makedirs(soundtracks_dir, exist_ok=True)
-                    temp_dir = tempfile.mkdtemp(prefix=f".import_{zip_name}_", dir=soundtracks_dir)
-                    z.extractall(temp_dir)
-
-                if os.path.isdir(final_dir):
-                    shutil.rmtree(final_dir, ignore_errors=True)
-
-                os.replace(temp_dir, final_dir)
-                self.file = os.path.join(final_dir, soundtrack_member)
-
-            except zipfile.BadZipFile:
-                if temp_dir and os.path.isdir(temp_dir):
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                QMessageBox.critical(self, "Unable to open zip file", f"Error: \"{os.path.basename(file_path)}\" is not a valid zip archive.")
-                return
-            except Exception as e:
-                if temp_dir and os.path.isdir(temp_dir):
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                QMessageBox.critical(self, "Unable to open zip file", f"Error while reading \"{os.path.basename(file_path)}\": {e}")
-                return
-            finally:
-                self.progress.close()
-
+            job = ImportJob(file_path)
+            job.result.connect(self.finish_open)
+            self.start_job(job, "Opening...", self.handle_open_exception)
         else:
-            self.file = file_path
+            self.finish_open(file_path)
 
+    def finish_open(self, file_path):
+        if not file_path:  # the import was canceled
+            return
+        self.file = file_path
         self.load_data()
         self.load_file()
         self.changes = False
         self.update_window_title()
         self.settings["prev"] = self.file
         self.write_settings()
-        print(self.file)
+        log.info("Opened %s", self.file)
         
     def save_file(self):
-        print("Save file action triggered")
+        log.info("Save file action triggered")
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Save File As",
@@ -853,7 +696,7 @@ class SoundtrackViewer(QMainWindow):
             "Soundtrack Files (*.soundtrack)"
         )
         if not file_path:
-            print("Save As... canceled")
+            log.info("Save As... canceled")
             return False
 
         if not file_path.lower().endswith(".soundtrack"):
@@ -864,7 +707,7 @@ class SoundtrackViewer(QMainWindow):
             return False
 
         self.file = file_path
-        print(file_path)
+        log.info("Saving to %s", file_path)
         if not self.write_file(target_file=self.file):
             return False
 
@@ -873,15 +716,11 @@ class SoundtrackViewer(QMainWindow):
         return True
         
     def export_file(self):
-        print("Export file action triggered")
+        log.info("Export file action triggered")
 
         # validate files ahead of time
-        rows = self.table.rowCount()
-        for r in range(rows):
-            source = self.table.cellWidget(r, 5).text()
-            if source:
-                if not self.validate_file(source, r):
-                    return
+        if not self.validate_sources():
+            return
         # we're good to export, open save dialog        
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -890,7 +729,7 @@ class SoundtrackViewer(QMainWindow):
             "Zip Files (*.zip)"
         )
         if not file_path:
-            print("Export canceled")
+            log.info("Export canceled")
             return False
 
         if not file_path.lower().endswith(".zip"):
@@ -903,29 +742,13 @@ class SoundtrackViewer(QMainWindow):
         # save temp soundtrack file
         os.makedirs("temp", exist_ok=True)
         temp_soundtrack = os.path.join("temp", os.path.splitext(os.path.basename(file_path))[0] + ".soundtrack")
-        print(temp_soundtrack)
+        log.debug("Writing temporary soundtrack %s", temp_soundtrack)
         if not self.write_file(export=True, target_file=temp_soundtrack):
             return False
 
-        print("Creating archive at", file_path)
-
-        self.thread = QThread()
-        self.worker = ExportWorker(self.settings, temp_soundtrack, file_path)
-        self.worker.moveToThread(self.thread)
-
-        self.progress = ProgressWidget("Exporting Soundtrack...")
-        self.progress.worker_thread = self.thread
-        self.progress.show()
+        log.info("Creating archive at %s", file_path)
 
-        # Connect signals
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress_changed.connect(self.progress.set_progress)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.progress.close)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.worker.error.connect(self.handle_export_exception)
-        self.thread.start()
+        self.start_job(ExportJob(self.settings, temp_soundtrack, file_path), "Exporting Soundtrack...", self.handle_export_exception)
 
     def handle_apply_exception(self, e):
         self.handle_worker_exception("Apply", e)
@@ -933,7 +756,14 @@ class SoundtrackViewer(QMainWindow):
     def handle_unapply_exception(self, e):
         self.handle_worker_exception("Unapply", e)
 
+    def handle_open_exception(self, e):
+        if isinstance(e, zipfile.BadZipFile):
+            QMessageBox.critical(self, "Unable to open zip file", f"Error: not a valid zip archive ({e}).")
+        else:
+            QMessageBox.critical(self, "Unable to open zip file", f"Error: {e}")
+
     def handle_load_exception(self, e):
+        self.scan_error = str(e).splitlines()[0] if str(e) else type(e).__name__
         self.handle_worker_exception("Load", e)
 
     def handle_export_exception(self, e):
@@ -966,7 +796,7 @@ class SoundtrackViewer(QMainWindow):
         )
         
     def apply_action(self):
-        print("Apply action triggered")
+        log.info("Apply action triggered")
         if self.changes:
             msg = QMessageBox()
             msg.setWindowTitle("Unsaved Changes")
@@ -991,91 +821,64 @@ class SoundtrackViewer(QMainWindow):
             QMessageBox.warning(self, "Missing File", "Save your soundtrack file before applying changes.")
             return
 
+        if not self.get_pointer_store().exists():
+            if self.load_job:
+                QMessageBox.warning(self, "Still Loading", "Pointers are still being found in the game files. Try again once they are done.")
+            elif QMessageBox.question(
+                self,
+                "Pointers Not Found",
+                f"The pointers in the game files have not been found{f' ({self.scan_error})' if self.scan_error else ''}. "
+                "Check the paths in Settings if this keeps happening.\n\nLook for them again now?",
+            ) == QMessageBox.Yes:
+                self.scan_pointers()
+            return
+
         # make sure all of the files are legit
-        rows = self.table.rowCount()
-        for r in range(rows):
-            source_widget = self.table.cellWidget(r, 5)
-            source = source_widget.text() if source_widget else ""
-            if source:
-                if not self.validate_file(source, r):
-                    return
+        if not self.validate_sources():
+            return
         
-        self.thread = QThread()
-        self.worker = WriteWorker(self.settings, self.file, str(self.get_ptrs_hash()) + ".json")
-        self.worker.moveToThread(self.thread)
+        self.start_job(WriteJob(self.settings, self.file, str(self.get_ptrs_hash())), "Applying Soundtrack...", self.handle_apply_exception)
 
-        self.progress = ProgressWidget("Applying Soundtrack...")
-        self.progress.worker_thread = self.thread
-        self.progress.show()
-
-        # Connect signals
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress_changed.connect(self.progress.set_progress)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.progress.close)
-        #self.thread.finished.connect(self.load_file)
-        self.thread.finished.connect(self.thread.deleteLater)
-
-        self.worker.error.connect(self.handle_apply_exception)
-        
-        self.thread.start()
+    def validate_sources(self):
+        rows = [(r, self.model.text(r, 5)) for r in range(self.model.rowCount())]
+        rows = [(r, source) for (r, source) in rows if source]
+        # start any probes that are not cached yet before waiting on the first one
+        for _, source in rows:
+            self.validator.probe(source)
+        return all(self.validate_file(source, r) for (r, source) in rows)
 
     def validate_file(self, source, r):
-        title = self.get_item_or_cellwidget(r, 1).text()
+        title = self.model.text(r, 1)
         source = self.validate_path(source, f"Source file for {title}", extensions=(".wav", ".mp3", ".aiff"))
         if not source:
             return False
 
-        if not os.path.isfile(source):
-            QMessageBox.warning(
-                self,
-                "Missing File",
-                f"Could not find source file for {title}.\n\nPath:\n{source}",
-            )
-            return False
-
-        if source.lower().endswith('.mp3'):
-            # codec check
-            try:
-                audio = mutagen.File(source)
-            except Exception as e:
-                QMessageBox.warning(self, "Codec Check Failed", f"Could not read the MP3 codec for {title}.\n\nReason: {e}")
-                return False
-            if audio is None:
+        verdict = self.validator.verdict(source)
+        if verdict is None:
+            return True
+        reason, detail = verdict
+        match reason:
+            case "missing":
+                QMessageBox.warning(
+                    self,
+                    "Missing File",
+                    f"Could not find source file for {title}.\n\nPath:\n{source}",
+                )
+            case "unreadable":
+                QMessageBox.warning(self, "Codec Check Failed", f"Could not read the MP3 codec for {title}.\n\nReason: {detail}")
+            case "no_metadata":
                 QMessageBox.warning(self, "Codec Check Failed", f"Could not read audio metadata for {title}.")
-                return False
-            if audio.__class__.__name__ == "MP4":
+            case "mp4a":
                 QMessageBox.warning(self, "Unsupported Codec", f"The source file for {title} uses an unsupported codec (mp4a). Please use mpga or convert it to WAV/AIFF.")
-                return False
-             
-        return True
+        return False
 
     def unapply_action(self):
-        print("Unapply action triggered")
-
-        self.thread = QThread()
-        self.worker = ResetWorker(self.settings)
-        self.worker.moveToThread(self.thread)
+        log.info("Unapply action triggered")
 
-        self.progress = ProgressWidget("Reverting Changes...")
-        self.progress.worker_thread = self.thread
-        self.progress.show()
-
-        # Connect signals
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress_changed.connect(self.progress.set_progress)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.progress.close)
-        self.thread.finished.connect(self.thread.deleteLater)
-
-        self.worker.error.connect(self.handle_unapply_exception)
-
-        self.thread.start()
+        self.start_job(ResetJob(self.settings), "Reverting Changes...", self.handle_unapply_exception)
         
     def reset_action(self):
-        print("Reset action triggered")
+        log.info("Reset action triggered")
         if self.changes:
             # Create the message box
             msg = QMessageBox()
@@ -1098,7 +901,7 @@ class SoundtrackViewer(QMainWindow):
         self.update_window_title()
 
     def toggle_actions(self):
-        print("Toggle actions pane")
+        log.info("Toggle actions pane")
         if self.actions:
             self.layout.removeWidget(self.actions)
             self.actions.hide()
@@ -1115,49 +918,34 @@ class SoundtrackViewer(QMainWindow):
             self.handle_selection_changed()
 
     def show_settings(self):
-        print("Settings action triggered")
+        log.info("Settings action triggered")
         prev_hash = self.get_ptrs_hash()
         prev_mod = self.settings.get("mod", False)
         dialog = SettingsDialog()
         if dialog.exec_():
-            print("Settings updated")
+            log.info("Settings updated")
             self.settings = self.load_settings()
+            self.prefetch_worker.settings = self.settings
             if self.get_ptrs_hash() != prev_hash:
-                # create a new pts json
-                filename = self.get_ptrs_hash() + ".json"
-                if not os.path.isfile(filename):
-                    print(f"Generating new ptrs for {filename}")
-                    
-                    self.progress = ProgressWidget("Finding pointers...")
-                    self.progress.show()
-                    
-                    self.thread = QThread()
-                    self.progress.thread = self.thread
-                    self.worker = LoadWorker(self.settings, filename)
-                    self.worker.moveToThread(self.thread)
-
-                    # Connect signals
-                    self.thread.started.connect(self.worker.run)
-                    self.worker.progress_changed.connect(self.progress.set_progress)
-                    self.worker.finished.connect(self.progress.close)
-                    self.worker.finished.connect(self.thread.quit)
-                    self.worker.finished.connect(self.worker.deleteLater)
-                    self.worker.finished.connect(self.fill_table)
-                    self.thread.finished.connect(self.thread.deleteLater)
-                    
-                    self.thread.start()
-                else:
-                    self.fill_table()
+                # refill for the new game, finding its pointers in the background if needed
+                self.load_data()
+            elif not self.get_pointer_store().exists():
+                # same game, but a fixed YAP path may let a failed scan through this time
+                self.scan_pointers()
             if prev_mod != self.settings.get("mod", False):
                 self.reset_action()
         else:
-            print("Settings canceled")
+            log.info("Settings canceled")
         
+    def show_diagnostics(self):
+        log.info("Diagnostics action triggered")
+        DiagnosticsDialog().exec_()
+
     def show_about(self):
-        print("About action triggered")
+        log.info("About action triggered")
         dialog = AboutDialog(self.get_ptrs_hash())
         if dialog.exec_():
-            print("Showing About")
+            log.info("Showing About")
 
     def move_song_up(self):
         self.move_song(down=False)
@@ -1166,19 +954,19 @@ class SoundtrackViewer(QMainWindow):
         self.move_song(down=True)
     
     def move_song(self, down):
-        print("Move song down action triggered")
-        row = self.table.currentRow()
-        col = self.table.currentColumn()
-        next_row = (row+1) % self.table.rowCount() if down else (row-1) % self.table.rowCount()
+        log.info("Move song %s action triggered", "down" if down else "up")
+        row = self.table.currentIndex().row()
+        col = self.table.currentIndex().column()
+        next_row = (row+1) % self.model.rowCount() if down else (row-1) % self.model.rowCount()
 
         row_data = self.get_table_row(row, inner=True)
         below_data = self.get_table_row(next_row, inner=True)
-        print(str(below_data))
+        log.debug("Swapping with %s", below_data)
 
         self.set_table_row(row, below_data, inner=True)
         self.set_table_row(next_row, row_data, inner=True)
 
-        index = self.table.model().index(next_row, col)
+        index = self.model.index(next_row, col)
 
         # Clear existing selection and select this index
         
@@ -1187,28 +975,29 @@ class SoundtrackViewer(QMainWindow):
 
 
     def insert_song(self):
-        print("Insert blank song action triggered")
+        log.info("Insert blank song action triggered")
         
     def clear_song(self):
-        print("Delete song action triggered")
-        row = self.table.currentRow()
+        log.info("Delete song action triggered")
+        row = self.table.currentIndex().row()
         self.set_table_row(row, BLANK_ROW, inner=True)
+        self.prefetch_worker.cancel(row)
 
     def play_song(self):
-        print("Play song action triggered")
+        log.info("Play song action triggered")
 
     def disambiguate_cell(self):
-        print("Disambiguating cell")
+        log.info("Disambiguating cell")
 
         selected = self.table.selectedIndexes()[0]
-        key = list(self.defaults.keys())[selected.row()]
+        key = self.catalog.keys[selected.row()]
         row = selected.row()
         col = selected.column()
 
-        cell = self.get_item_or_cellwidget(row, col)
+        cell = self.model.cell(row, col)
 
         # TODO if cell is locked, show warning here
-        if isinstance(cell, LockedCellWidget) and self.settings["warn"]:
+        if cell.locked and not cell.disambiguated and self.settings["warn"]:
             msg = QMessageBox()
             msg.setWindowTitle("Warning")
             msg.setText("Disambiguating a locked cell can lead to crashes when viewing or playing the associated song. Would you like to continue?")
@@ -1224,209 +1013,74 @@ class SoundtrackViewer(QMainWindow):
 
         dialog = DisambiguateDialog(self.get_ptrs_hash(), key, col)
         if dialog.exec_():
-            print("Disambiguation submitted")
-            # remove cell color, add disambiguated tag, replace cell widget
-            if hasattr(cell, "disambiguated") and cell.disambiguated:
-                # already disambiguated, just update override tooltip
-                cell.setToolTip(str(dialog.selected_option()))
-            elif isinstance(cell, LockedCellWidget):
-                cell = self.table.cellWidget(row, col)
-                self.table.setItem(row, col, self.make_disambiguated_cell(cell.text(), cell.text(), dialog.selected_option()))
-                self.table.setCellWidget(row, col, None)
-            else:
-                self.table.setItem(row, col, self.make_disambiguated_cell(cell.text(), cell.background(), dialog.selected_option()))
+            log.info("Disambiguation submitted")
+            # drops the sync color or lock and shows the disambiguated star
+            self.model.set_override(row, col, dialog.selected_option())
             # reveal Un-disambiguate button
             self.undisambiguate_btn.show()
         else:
-            print("Disambiguation canceled")
+            log.info("Disambiguation canceled")
 
     def undisambiguate_cell(self):
-        print("Undisambiguating cell")
+        log.info("Undisambiguating cell")
         selected = self.table.selectedIndexes()[0]
-        key = list(self.defaults.keys())[selected.row()]
+        key = self.catalog.keys[selected.row()]
 
         # remove entry from the overrides object
         try:
-            filename = str(self.get_ptrs_hash()) + ".json"
-            if os.path.isfile(filename):
-                with open(filename, "r") as file:
-                    ptrs = json.load(file)
-                del ptrs[key]["overrides"][col_to_key(selected.column())]
-                if len(ptrs[key]["overrides"]) == 0:
-                    del ptrs[key]["overrides"]
-                with open(filename, "w") as file:
-                    json.dump(ptrs, file, indent=2)
+            store = self.get_pointer_store()
+            if store.exists():
+                store.clear_override(key, col_to_key(selected.column()))
 
         except FileNotFoundError:
-            QMessageBox.critical(self, "Critical Error", f"Undisambiguate Error: Pointers file \"{self.get_ptrs_hash()}.json\" not found. Try pressing Reset.")
-        except json.JSONDecodeError:
-            QMessageBox.critical(self, "Critical Error", f"Undisambiguate Error: Invalid JSON in \"{self.get_ptrs_hash()}.json\". Try pressing Reset.")
+            QMessageBox.critical(self, "Critical Error", f"Undisambiguate Error: Pointers file \"{self.get_ptrs_hash()}.db\" not found. Try pressing Reset.")
+        except sqlite3.DatabaseError as e:
+            QMessageBox.critical(self, "Critical Error", f"Undisambiguate Error: Pointers file \"{self.get_ptrs_hash()}.db\" is damaged ({e}). Delete it and reopen BPSS to regenerate pointers.")
         except Exception as e:
             QMessageBox.critical(self, "Critical Error", f"Undisambiguate Error: {e}")
-        # revert cell to previous state
-        # test for locked cell via jank method
-        cell = self.table.item(selected.row(), selected.column())
-        if isinstance(cell.prev_color, QBrush) or isinstance(cell.prev_color, int):
-            self.table.setItem(selected.row(), selected.column(), self.make_unique_cell(cell.text(), cell.prev_color))
-        else:
-            self.table.setItem(selected.row(), selected.column(), None)
-            self.table.setCellWidget(selected.row(), selected.column(), LockedCellWidget(cell.prev_color))
+        # revert cell to its synced or locked state
+        self.model.set_override(selected.row(), selected.column(), None)
         self.undisambiguate_btn.hide()
     
-    def get_item_or_cellwidget(self, row, col):
-        item = self.table.item(row, col)
-        if item is not None:
-            return item
-        return self.table.cellWidget(row, col)
-
-    def get_cell_text(self, row, col):
-        cell = self.get_item_or_cellwidget(row, col)
-        if cell is None:
-            return ""
-        if hasattr(cell, "text"):
-            return cell.text()
-        return ""
-    
     def get_table_row(self, ind, inner=False):
-        print("Getting table row " + str(ind))
-        row_data = {}
-        default = self.defaults[list(self.defaults.keys())[ind]]
-        row_data["strings"] = {
-            "title": self.get_cell_text(ind, 1),
-            "album": self.get_cell_text(ind, 2),
-            "artist": self.get_cell_text(ind, 3),
-            "stream": self.get_cell_text(ind, 4)
-        }
-        row_data["source"] = self.get_cell_text(ind, 5)
-
-        match default["type"]:
-            case 0: # regular soundtrack
-                match default["lock"]:
-                    case 1: # no album (FRICTION)
-                        cell = self.get_item_or_cellwidget(ind, 2)
-                        if inner and cell is not None and hasattr(cell, "innerText"):
-                            row_data["strings"]["album"] = cell.innerText
-                    case 3: # artist/album sync
-                        cell = self.get_item_or_cellwidget(ind, 2)
-                        if inner and cell is not None and hasattr(cell, "innerText"):
-                            row_data["strings"]["album"] = cell.innerText
-                    case 6: # stream/artist sync
-                        cell = self.get_item_or_cellwidget(ind, 3)
-                        if inner and cell is not None and hasattr(cell, "innerText"):
-                            row_data["strings"]["artist"] = cell.innerText
-                    case 7: # stream/artist/album sync
-                        album_cell = self.get_item_or_cellwidget(ind, 2)
-                        artist_cell = self.get_item_or_cellwidget(ind, 3)
-                        if inner and album_cell is not None and hasattr(album_cell, "innerText"):
-                            row_data["strings"]["album"] = album_cell.innerText
-                        if inner and artist_cell is not None and hasattr(artist_cell, "innerText"):
-                            row_data["strings"]["artist"] = artist_cell.innerText
-                    case 9: # song/album sync
-                        title_cell = self.get_item_or_cellwidget(ind, 1)
-                        album_cell = self.get_item_or_cellwidget(ind, 2)
-                        if inner and title_cell is not None and hasattr(title_cell, "innerText"):
-                            row_data["strings"]["title"] = title_cell.innerText
-                        if inner and album_cell is not None and hasattr(album_cell, "innerText"):
-                            row_data["strings"]["album"] = album_cell.innerText
-            case 1 | 2:
-                pass
+        log.debug("Getting table row %d", ind)
+        row_data = {"strings": {}}
+        for col in range(1, 5):
+            # cells overwritten by a shared string remember this song's own value
+            cell = self.model.cell(ind, col)
+            if inner and cell.inner is not None:
+                row_data["strings"][col_to_key(col)] = cell.inner
+            else:
+                row_data["strings"][col_to_key(col)] = self.model.text(ind, col)
+        row_data["source"] = self.model.text(ind, 5)
         
         return row_data
 
     def set_table_row(self, ind, row, inner=False):
-        print("Setting table row " + str(ind))
+        log.debug("Setting table row %d", ind)
+        self.dirty_rows.add(ind)
         strings = row.get("strings", "")
-        title = strings.get("title", "")
-        album = strings.get("album", "")
-        artist = strings.get("artist", "")
-        stream = strings.get("stream", "")
         
         # Get source and file
         source = row.get("source", "")
 
-        key = list(self.defaults.keys())[ind]
-
-        print(title)
-
         if not inner:
-            self.table.cellWidget(ind, 4).setText(stream)
-
-        # Apply soundtrack content
-        match self.defaults[key]["type"]:
-            case 0: # regular soundtrack
-                match self.defaults[key]["lock"]:
-                    case 0: # no lock
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        self.get_item_or_cellwidget(ind, 2).setText(album)
-                        self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-                    case 1: # no album (FRICTION)
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        if inner:
-                            self.get_item_or_cellwidget(ind, 2).innerText = album
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                        else:
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                        self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-                    case 3: # artist/album sync
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        if inner:
-                            self.get_item_or_cellwidget(ind, 2).innerText = album
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                        else:
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                        self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-                    case 6: # stream/artist sync
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        self.get_item_or_cellwidget(ind, 2).setText(album)
-                        if inner:
-                            if hasattr(self.get_item_or_cellwidget(ind, 3), "disambiguated"):
-                                self.get_item_or_cellwidget(ind, 3).setText(artist)
-                            else:
-                                self.get_item_or_cellwidget(ind, 3).innerText = artist
-                        else:
-                            self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-                    case 7: # stream/artist/album sync
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        if inner:
-                            if hasattr(self.get_item_or_cellwidget(ind, 2), "disambiguated"):
-                                self.get_item_or_cellwidget(ind, 2).setText(album)
-                            else:
-                                self.get_item_or_cellwidget(ind, 2).innerText = album
-                            if hasattr(self.get_item_or_cellwidget(ind, 3), "disambiguated"):
-                                self.get_item_or_cellwidget(ind, 3).setText(artist)
-                            else:
-                                self.get_item_or_cellwidget(ind, 3).innerText = artist
-                        else:
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                            self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-                    case 9: # song/album sync
-                        if inner:
-                            self.get_item_or_cellwidget(ind, 2).innerText = album
-                            self.get_item_or_cellwidget(ind, 2).setText(album)
-                        else:
-                            self.get_item_or_cellwidget(ind, 2).setText(album) # do it out of order so events propagate and prioritize title
-                        self.get_item_or_cellwidget(ind, 1).setText(title)
-                        self.get_item_or_cellwidget(ind, 3).setText(artist)
-                        self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-
-            case 1: # burnout soundtrack
-                self.get_item_or_cellwidget(ind, 1).setText(title)
-                self.get_item_or_cellwidget(ind, 2).setText(album)
-                self.get_item_or_cellwidget(ind, 3).setText(artist)
-                self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
-            case 2: # classical soundtrack
-                self.get_item_or_cellwidget(ind, 1).setText(title)
-                self.get_item_or_cellwidget(ind, 2).setText(album)
-                self.get_item_or_cellwidget(ind, 3).setText(artist)
-                self.get_item_or_cellwidget(ind, 5).setText(source or "")  # Ensure source is never None
+            self.model.set_text(ind, 4, strings.get("stream", ""))
+
+        # Apply soundtrack content, shared fields first so the field they are named after wins
+        for col in SET_ORDER:
+            value = strings.get(col_to_key(col), "")
+            cell = self.model.cell(ind, col)
+            if inner and self.sync_groups.is_shadowed((ind, col)) and not (cell.locked and cell.disambiguated):
+                cell.inner = value
+                if cell.locked:
+                    continue
+            self.model.set_text(ind, col, value)
+        self.model.set_text(ind, 5, source or "")  # Ensure source is never None
 
 if __name__ == "__main__":
+    setup_logging(logging.DEBUG if "--debug" in sys.argv else logging.INFO)
     app = QApplication(sys.argv)
-    viewer = SoundtrackViewer()
+    viewer = SoundtrackViewer(profile="--profile" in sys.argv)
     viewer.show()
     sys.exit(app.exec_())
@@ -0,0 +1,118 @@
+import sqlite3
+import time
+
+from RunHistory import history
+from Tracing import stage as trace_stage
+from Logs import get_logger
+
+log = get_logger("estimates")
+
+# an ETA is only shown once this much of the expected work is done, and this long has passed
+ETA_MIN_FRACTION = 0.02
+ETA_MIN_SECONDS = 1.0
+
+class ProgressPlan:
+    """Overall progress and an ETA for a long function, weighted by how long its stages took before.
+
+    The function names its stages up front, each with a rough cost in seconds per unit
+    of work, and walks through them with stage() and advance(). Past runs replace those
+    guesses: the run history keeps each stage's seconds and units, so a stage is
+    expected to take its recent seconds per unit times the units it has this time.
+    Before a stage starts it is expected to have as many units as it usually does,
+    unless expect() says otherwise.
+
+    The remaining time is the expected time left, stretched or shrunk by how far the
+    run is ahead of or behind that expectation so far. Finished runs save their
+    timings for the next one; failed and canceled runs don't.
+    """
+    def __init__(self, kind, stages, set_progress=None):
+        self.kind = kind
+        self.set_progress = set_progress
+        try:
+            known = history.stage_estimates(kind)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Could not read stage timings for %s: %s", kind, e)
+            known = {}
+        self.known = set(known)  # stages whose rate comes from the history rather than a guess
+        self.rates = {}     # stage -> seconds per unit
+        self.units = {}     # stage -> units of work
+        for name, rate in stages.items():
+            self.rates[name], self.units[name] = known.get(name, (rate, 1))
+        self.guesses = {}   # stage -> seconds, from a model of its own, used when there is no history
+        self.names = list(stages)
+        self.current = None
+        self.fraction = 0.0
+        self.value = 0
+        self.started = time.perf_counter()
+        self.stage_started = self.started
+        self.timings = {}   # stage -> (seconds, units), for stages that have ended
+
+    def expect(self, name, units=None, seconds=None):
+        # what a stage that hasn't started yet is up against
+        if units is not None:
+            self.units[name] = units
+        if seconds is not None:
+            self.guesses[name] = seconds
+
+    def expected(self, name):
+        if name in self.guesses and name not in self.known:
+            return self.guesses[name]
+        return self.rates[name] * self.units[name]
+
+    def stage(self, name, status, units=None, trace=True, **args):
+        # ends the current stage and starts name, which also becomes a trace stage unless trace is False
+        self.end_stage()
+        # stages listed before this one that never ran were skipped, and cost nothing
+        for skipped in self.names[:self.names.index(name)]:
+            if skipped not in self.timings:
+                self.units[skipped] = 0
+                self.guesses.pop(skipped, None)
+        if units is not None:
+            self.units[name] = units
+        self.current = name
+        self.fraction = 0.0
+        self.stage_started = time.perf_counter()
+        if trace:
+            trace_stage(name, **args)
+        self.report(status)
+
+    def advance(self, done, total, status=""):
+        # progress within the current stage
+        self.fraction = min(1.0, done / total) if total else 1.0
+        self.report(status)
+
+    def end_stage(self):
+        if self.current:
+            self.timings[self.current] = (time.perf_counter() - self.stage_started, self.units[self.current])
+            self.current = None
+
+    def done_seconds(self):
+        # expected seconds of the work done so far
+        if not self.current:
+            return sum(self.expected(name) for name in self.timings)
+        index = self.names.index(self.current)
+        done = sum(self.expected(name) for name in self.names[:index])
+        return done + self.expected(self.current) * self.fraction
+
+    def report(self, status):
+        if not self.set_progress:
+            return
+        total = sum(self.expected(name) for name in self.names)
+        done = self.done_seconds()
+        # never step backwards when a later stage turns out bigger than expected
+        if total:
+            self.value = max(self.value, min(99, int(done / total * 100)))
+        eta = None
+        elapsed = time.perf_counter() - self.started
+        if total and done / total >= ETA_MIN_FRACTION and elapsed >= ETA_MIN_SECONDS:
+            eta = (total - done) * elapsed / done
+        self.set_progress(self.value, status, eta)
+
+    def finish(self, status):
+        self.end_stage()
+        if self.set_progress:
+            self.set_progress(100, status, 0)
+        try:
+            history.record_stages(self.kind, self.timings)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("Could not save stage timings for %s: %s", self.kind, e)
@@ -2,6 +2,7 @@ import os
 import sys
 import re
 import hashlib
+import zipfile
 
 MAX_PATH_LENGTH = 240
 MAX_FILENAME_LENGTH = 120
@@ -76,16 +77,68 @@ def require_path_rules(path, label, extensions=None, enforce_filename_rules=Fals
         raise ValueError(error_message)
     return normalized
 
-def hash_file(path):
+def hash_stream(src, set_progress=None):
     digest = hashlib.sha256()
-    with open(path, "rb") as f:
-        while True:
-            chunk = f.read(1024 * 1024)
-            if not chunk:
-                break
-            digest.update(chunk)
+    while True:
+        chunk = src.read(1024 * 1024)
+        if not chunk:
+            break
+        digest.update(chunk)
+        if set_progress: set_progress(len(chunk))
     return digest.hexdigest()
 
+def hash_file(path):
+    with open_source(path) as f:
+        return hash_stream(f)
+
+def split_zip_path(path):
+    # Sources can point inside a zip, e.g. "packs/mine.zip/song.mp3".
+    # Returns (archive, member) for those and None for plain paths.
+    parts = os.path.normpath(path).split(os.sep)
+    for i, part in enumerate(parts[:-1]):
+        if part.lower().endswith(".zip"):
+            archive = os.sep.join(parts[:i + 1])
+            if os.path.isfile(archive):
+                return archive, "/".join(parts[i + 1:])
+    return None
+
+def open_source(path):
+    # Opens a source file, or a source inside a zip, for binary reading
+    zip_path = split_zip_path(path)
+    if not zip_path:
+        return open(path, "rb")
+    with zipfile.ZipFile(zip_path[0], "r") as archive:
+        # the member keeps the underlying file open after the archive closes
+        return archive.open(zip_path[1])
+
+def source_exists(path):
+    zip_path = split_zip_path(path)
+    if not zip_path:
+        return os.path.isfile(path)
+    try:
+        with zipfile.ZipFile(zip_path[0], "r") as archive:
+            archive.getinfo(zip_path[1])
+        return True
+    except (KeyError, zipfile.BadZipFile, OSError):
+        return False
+
+def source_stat(path):
+    # (size, mtime) of a source, or of the zip holding it; None if it is missing
+    zip_path = split_zip_path(path)
+    try:
+        stat = os.stat(zip_path[0] if zip_path else path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def source_size(path):
+    # bytes of a source; for one inside a zip, its uncompressed size
+    zip_path = split_zip_path(path)
+    if not zip_path:
+        return os.path.getsize(path)
+    with zipfile.ZipFile(zip_path[0], "r") as archive:
+        return archive.getinfo(zip_path[1]).file_size
+
 def coerce_bool(val, default=False):
     if isinstance(val, bool):
         return val
@@ -1,5 +1,9 @@
 import struct
 import json
+import logging
+from Logs import get_logger
+
+log = get_logger("hexnavigator")
 
 class HexNavigator:
     def __init__(self, filepath):
@@ -35,7 +39,7 @@ class HexNavigator:
         while True:
             byte = self.file.read(1)
             if byte == b'':
-                print("Reached EOF while reading C-string")
+                log.warning("Reached EOF while reading C-string")
                 break
             if byte == b'\x00':
                 break
@@ -58,7 +62,7 @@ class HexNavigator:
         else:
             needle = pattern.encode(encoding)
 
-        print(f"Searching for pattern: {needle.hex()}")
+        log.debug("Searching for pattern: %s", needle.hex())
 
         self.file.seek(0)
         chunk_size = 4096
@@ -72,17 +76,19 @@ class HexNavigator:
             if not data:
                 break  # EOF
 
-            buffer = buffer[-overlap:] + data
+            # the tail of the last chunk catches matches that straddle the boundary
+            tail = buffer[-overlap:] if overlap else b''
+            buffer = tail + data
             index = buffer.find(needle)
             if index != -1:
-                found_offset = pos + index - overlap
-                print(f"Found at offset 0x{found_offset:X}")
+                found_offset = pos + index - len(tail)
+                log.debug("Found at offset 0x%X", found_offset)
                 self.seek(found_offset)
                 return found_offset
 
             pos += len(data)
 
-        print("Pattern not found.")
+        log.debug("Pattern not found.")
         return -1
 
     def find_all(self, pattern, start=0, hex=False, encoding='ascii'):
@@ -95,13 +101,14 @@ class HexNavigator:
         else:
             needle = pattern.encode(encoding)
 
-        print(f"Searching for all instances of pattern: {needle.hex()}")
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug: log.debug("Searching for all instances of pattern: %s", needle.hex())
 
         self.file.seek(start)
         chunk_size = 4096
         overlap = len(needle) - 1
 
-        pos = 0
+        pos = start
         buffer = b''
         offsets = []
 
@@ -110,7 +117,8 @@ class HexNavigator:
             if not data:
                 break  # EOF
 
-            buffer = buffer[-overlap:] + data
+            tail = buffer[-overlap:] if overlap else b''
+            buffer = tail + data
 
             search_start = 0
             while True:
@@ -118,16 +126,16 @@ class HexNavigator:
                 if index == -1:
                     break
 
-                found_offset = pos + index - overlap
-                print(f"Found at offset 0x{found_offset:X}")
+                found_offset = pos + index - len(tail)
+                if debug: log.debug("Found at offset 0x%X", found_offset)
                 offsets.append(found_offset)
 
                 search_start = index + 1  # keep searching after this match
 
             pos += len(data)
 
-        if not offsets:
-            print("Pattern not found.")
+        if not offsets and debug:
+            log.debug("Pattern not found.")
 
         return offsets
 
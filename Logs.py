@@ -0,0 +1,86 @@
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+LOGS_DIR = "logs"
+LOG_FILE = os.path.join(LOGS_DIR, "bpss.log")
+LOG_FILE_SIZE = 1024 * 1024  # bytes per file before it rolls over
+LOG_FILE_COUNT = 3           # rolled-over files kept
+RING_SIZE = 500              # recent records kept in memory for crash reports
+FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(threadName)s] %(message)s"
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory so a crash report can include them.
+
+    Records are only formatted when a report is written.
+    """
+    def __init__(self, capacity=RING_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self):
+        return [self.format(record) for record in list(self.records)]
+
+ring = RingBufferHandler()
+
+def get_logger(name):
+    # every module logs under bpss.<module>, so levels can be set per module
+    return logging.getLogger(f"bpss.{name}")
+
+def setup_logging(level=logging.INFO):
+    # Debug records on the hot paths are dropped before they are built unless level
+    # is DEBUG, which BPSS_LOG_LEVEL=DEBUG or --debug turns on.
+    env = os.environ.get("BPSS_LOG_LEVEL")
+    if env:
+        # getLevelName maps names to numbers, and anything it doesn't know to a string
+        named = logging.getLevelName(env.upper())
+        if isinstance(named, int):
+            level = named
+    formatter = logging.Formatter(FORMAT)
+    root = logging.getLogger("bpss")
+    root.setLevel(level)
+
+    ring.setFormatter(formatter)
+    root.addHandler(ring)
+
+    try:
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_FILE_SIZE, backupCount=LOG_FILE_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        root.addHandler(file_handler)
+    except OSError as e:
+        root.warning("Could not open %s: %s", LOG_FILE, e)
+
+    # the windowed build has no console to write to
+    if sys.stderr:
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        root.addHandler(console)
+
+    sys.excepthook = log_crash
+    threading.excepthook = lambda args: log_crash(args.exc_type, args.exc_value, args.exc_traceback)
+
+def write_crash_report():
+    # the recent log, newest last, in logs/crash-<time>.log
+    path = os.path.join(LOGS_DIR, f"crash-{time.strftime('%Y%m%d-%H%M%S')}.log")
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(ring.lines()) + "\n")
+    return path
+
+def log_crash(exc_type, exc_value, exc_traceback):
+    logger = get_logger("crash")
+    logger.critical("Unhandled exception", exc_info=(exc_type, exc_value, exc_traceback))
+    try:
+        logger.critical("Crash report written to %s", write_crash_report())
+    except OSError as e:
+        logger.critical("Could not write crash report: %s", e)
@@ -0,0 +1,357 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+
+# overrides are committed this long after the last change, so a burst of edits is one write
+SAVE_DELAY = 0.5
+FIELDS = ["title", "stream", "artist", "album"]
+# kept in the database's user_version; stores older than this are found again.
+# 2: pointers in the first 4 KB of the vault were recorded a few bytes early.
+FORMAT_VERSION = 2
+LEGACY_VERSION = 1  # what a migrated <hash>.json counts as
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    position INTEGER PRIMARY KEY,
+    song TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fields (
+    position INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    loc INTEGER,
+    targets BLOB NOT NULL,
+    override INTEGER,
+    PRIMARY KEY (position, field)
+);
+CREATE INDEX IF NOT EXISTS fields_by_value ON fields (field, value);
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def pack_targets(targets):
+    # pointer locations are stored as little-endian uint32 arrays
+    packed = array("I", targets)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+def unpack_targets(blob):
+    targets = array("I")
+    targets.frombytes(blob)
+    if sys.byteorder != "little":
+        targets.byteswap()
+    return targets.tolist()
+
+class PointerTable:
+    """Every song's pointers packed into flat arrays, for lookups without dicts per song.
+
+    Slot row * 4 + field holds a field's interned string id, its location and the
+    start and length of its run in one shared uint32 array of pointer locations.
+    A reverse index maps (field, string id) to the rows that own pointers for it.
+    """
+    def __init__(self, rows):
+        self.songs = []        # row -> song key
+        self.rows = {}         # song key -> row
+        self.strings = []      # string id -> string
+        self.string_ids = {}   # string -> string id
+        self.values = array("i")   # slot -> string id, -1 if the song has no such field
+        self.locs = array("I")
+        self.starts = array("I")
+        self.counts = array("I")
+        self.targets = array("I")
+        self.overrides = {}    # slot -> pointer location picked by disambiguation
+        self.owners = {}       # (field index, string id) -> rows with their own pointers for it
+
+        for song, field, value, loc, targets, override in rows:
+            row = self.rows.get(song)
+            if row is None:
+                row = self.rows[song] = len(self.songs)
+                self.songs.append(song)
+                self.values.extend([-1] * len(FIELDS))
+                for column in (self.locs, self.starts, self.counts):
+                    column.extend([0] * len(FIELDS))
+            if field is None:
+                continue
+            f = FIELDS.index(field)
+            slot = row * len(FIELDS) + f
+            self.values[slot] = self.intern(value)
+            self.locs[slot] = loc or 0
+            self.starts[slot] = len(self.targets)
+            self.targets.extend(unpack_targets(targets))
+            self.counts[slot] = len(self.targets) - self.starts[slot]
+            if self.counts[slot]:
+                self.owners.setdefault((f, self.values[slot]), array("I")).append(row)
+            if override is not None:
+                self.overrides[slot] = override
+
+    def intern(self, value):
+        if value is None:
+            return -1
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def slot(self, song, field):
+        row = self.rows.get(song)
+        if row is None:
+            return None
+        return row * len(FIELDS) + FIELDS.index(field)
+
+    def run(self, slot):
+        start = self.starts[slot]
+        return self.targets[start:start + self.counts[slot]].tolist()
+
+    def shared_runs(self, slot):
+        # pointer lists of other songs with their own pointers for the same string
+        f = slot % len(FIELDS)
+        row = slot // len(FIELDS)
+        for other in self.owners.get((f, self.values[slot]), ()):
+            if other != row:
+                yield self.run(other * len(FIELDS) + f)
+
+    def targets_for(self, song, field):
+        slot = self.slot(song, field)
+        if slot is None:
+            return None
+        row_slots = range(slot - slot % len(FIELDS), slot - slot % len(FIELDS) + len(FIELDS))
+        if all(self.values[s] == -1 for s in row_slots):
+            # song was not found in the vault
+            return []
+
+        if slot in self.overrides:
+            return [self.overrides[slot]]
+
+        if self.counts[slot]:
+            return self.run(slot)
+
+        # Some rows do not expose their own pointer list; borrow from another row
+        # with the same original string value for this field.
+        if self.values[slot] != -1:
+            for run in self.shared_runs(slot):
+                return run
+        return None
+
+    def candidates_for(self, song, field):
+        slot = self.slot(song, field)
+        options = self.run(slot)
+        if len(options) <= 1:
+            options = [run for run in self.shared_runs(slot) if len(run) > 1][0]
+        return options
+
+class PointerStore:
+    """Pointer data for one game install, shared by everything in the process.
+
+    Backed by a small SQLite database, <hash>.db, with one row per song field holding
+    its string, its location and its pointer locations as a packed uint32 array.
+    Single songs are read on demand, pointer lookups go through a PointerTable that
+    is loaded once and kept resident, and override changes are written as
+    single-row updates. Old <hash>.json files are migrated on first use.
+
+    A database older than FORMAT_VERSION is stale: exists() says no, so the next
+    scan rebuilds it, and replace() carries its overrides over to the new one.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.path = name + ".db"
+        self.legacy_path = name + ".json"
+        self.lock = threading.RLock()
+        self.conn = None
+        self.stale = False
+        self.table = None
+        self.timer = None
+        self.connect()
+
+    @classmethod
+    def open(cls, name):
+        with _stores_lock:
+            store = _stores.get(name)
+            if store is None:
+                store = _stores[name] = cls(name)
+            else:
+                store.refresh()
+            return store
+
+    @classmethod
+    def flush_all(cls):
+        with _stores_lock:
+            stores = list(_stores.values())
+        for store in stores:
+            store.flush()
+
+    def connect(self):
+        with self.lock:
+            if os.path.isfile(self.path):
+                self.conn = sqlite3.connect(self.path, check_same_thread=False)
+                self.conn.executescript(SCHEMA)
+                self.stale = self.conn.execute("PRAGMA user_version").fetchone()[0] < FORMAT_VERSION
+            elif os.path.isfile(self.legacy_path):
+                self.migrate()
+
+    def migrate(self):
+        # one-time move from a pretty-printed <hash>.json, kept aside as .bak
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.replace(data, LEGACY_VERSION)
+        os.replace(self.legacy_path, self.legacy_path + ".bak")
+
+    def refresh(self):
+        # reconnect if the database was deleted or created by someone else
+        with self.lock:
+            if self.conn and not os.path.isfile(self.path):
+                self.close()
+            if not self.conn:
+                self.connect()
+
+    def close(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+            self.stale = False
+            self.table = None
+
+    def exists(self):
+        with self.lock:
+            if self.conn is None or self.stale:
+                return False
+            return self.conn.execute("SELECT 1 FROM songs LIMIT 1").fetchone() is not None
+
+    def build_entries(self, rows):
+        entries = {}
+        for song, field, value, loc, targets, override in rows:
+            entry = entries.setdefault(song, {})
+            if field is None:
+                continue
+            entry.setdefault("strings", {})[field] = value
+            if loc is not None:
+                entry.setdefault("locs", {})[field] = loc
+            entry.setdefault("ptrs", {})[field] = unpack_targets(targets)
+            if override is not None:
+                entry.setdefault("overrides", {})[field] = override
+        return entries
+
+    def songs(self):
+        # every song in file order, in the same shape load_pointers builds
+        with self.lock:
+            if not self.conn:
+                return {}
+            rows = self.conn.execute(
+                "SELECT s.song, f.field, f.value, f.loc, f.targets, f.override FROM songs s "
+                "LEFT JOIN fields f ON f.position = s.position ORDER BY s.position"
+            ).fetchall()
+            return self.build_entries(rows)
+
+    def entry(self, song):
+        with self.lock:
+            if not self.conn:
+                return None
+            rows = self.conn.execute(
+                "SELECT s.song, f.field, f.value, f.loc, f.targets, f.override FROM songs s "
+                "LEFT JOIN fields f ON f.position = s.position WHERE s.song = ?", (song,)
+            ).fetchall()
+            return self.build_entries(rows).get(song)
+
+    def get_table(self):
+        # loaded in one query the first time a lookup needs it, then kept resident
+        with self.lock:
+            if self.table is None:
+                rows = self.conn.execute(
+                    "SELECT s.song, f.field, f.value, f.loc, f.targets, f.override FROM songs s "
+                    "LEFT JOIN fields f ON f.position = s.position ORDER BY s.position"
+                ).fetchall()
+                self.table = PointerTable(rows)
+            return self.table
+
+    def targets(self, song, field):
+        # pointer locations that field of song is written through, or None if unknown
+        with self.lock:
+            return self.get_table().targets_for(song, field)
+
+    def candidates(self, song, field):
+        # every pointer location a shared string is reached through, to pick one from
+        with self.lock:
+            return self.get_table().candidates_for(song, field)
+
+    def set_override(self, song, field, target):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE fields SET override = ? WHERE field = ? AND position = (SELECT position FROM songs WHERE song = ?)",
+                (target, field, song)
+            )
+            if self.table is not None:
+                slot = self.table.slot(song, field)
+                if target is None:
+                    self.table.overrides.pop(slot, None)
+                else:
+                    self.table.overrides[slot] = target
+            self.save()
+
+    def clear_override(self, song, field):
+        self.set_override(song, field, None)
+
+    def kept_overrides(self, data):
+        # overrides in the current database that still name a pointer in data
+        if not self.conn:
+            return {}
+        targets = {loc for entry in data.values() for ptrs in entry.get("ptrs", {}).values() for loc in ptrs}
+        rows = self.conn.execute(
+            "SELECT s.song, f.field, f.override FROM fields f JOIN songs s ON s.position = f.position "
+            "WHERE f.override IS NOT NULL"
+        ).fetchall()
+        return {(song, field): override for song, field, override in rows if override in targets}
+
+    def replace(self, data, version=FORMAT_VERSION):
+        # build a fresh database next to the real one and swap it in, so a crash never leaves half a file
+        with self.lock:
+            kept = self.kept_overrides(data)
+            temp_path = self.path + ".part"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            conn = sqlite3.connect(temp_path)
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            for position, (song, entry) in enumerate(data.items()):
+                conn.execute("INSERT INTO songs VALUES (?, ?)", (position, song))
+                strings = entry.get("strings", {})
+                locs = entry.get("locs", {})
+                ptrs = entry.get("ptrs", {})
+                overrides = entry.get("overrides", {})
+                for field in FIELDS:
+                    if field not in strings:
+                        continue
+                    conn.execute(
+                        "INSERT INTO fields VALUES (?, ?, ?, ?, ?, ?)",
+                        (position, field, strings[field], locs.get(field), pack_targets(ptrs.get(field, [])),
+                         overrides.get(field, kept.get((song, field))))
+                    )
+            conn.commit()
+            conn.close()
+            self.close()
+            os.replace(temp_path, self.path)
+            self.connect()
+
+    def save(self):
+        # debounce: restart the countdown on every change
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+            self.timer = threading.Timer(SAVE_DELAY, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if self.conn:
+                self.conn.commit()
@@ -1,49 +1,179 @@
+import hashlib
 import json
 import os
+import re
 import shutil
 import struct
 import subprocess
+import sqlite3
+import tempfile
+import threading
+import time
 import zipfile
+import zlib
+import mutagen
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from HexNavigator import HexNavigator
-from Helpers import resource_path, require_path_rules, hash_file
-from PyQt5.QtCore import QThread
+from PointerStore import PointerStore, FIELDS
+from SongCatalog import SongCatalog
+from Tracing import span, stage, traced, profiled, wait_process
+from Estimates import ProgressPlan
+from RunHistory import history
+from Logs import get_logger
+from ZipWriter import ZipWriter
+from Helpers import require_path_rules, hash_file, hash_stream, split_zip_path, open_source, source_exists, source_size
 
 SX_CACHE_DIR = os.path.join("temp", "sx_cache")
+SX_WORK_DIR = os.path.join("temp", "sx_work")
+SOUNDTRACKS_DIR = "soundtracks"
+SX_ARGS = ['-sndplayer', '-ealayer3_int', '-vbr100', '-playlocstream']
+# PCM sources shrink a lot under deflate, anything else is stored as-is
+DEFLATE_EXTENSIONS = (".wav", ".aiff", ".aif")
+# converted payloads are only interchangeable between identical sx arguments
+SX_PROFILE = hashlib.sha256(" ".join(SX_ARGS).encode()).hexdigest()[:8]
+SX_PAYLOAD_DIR = "sx"
+SX_PAYLOAD_RE = re.compile(re.escape(SX_PAYLOAD_DIR) + r"/([0-9a-f]{8})/([0-9a-f]{64})(\.sn[rs])", re.IGNORECASE)
+# keeps sx and YAP from flashing a console window on Windows
+NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+OUTPUT_TAIL_LINES = 40  # lines of sx/YAP stdout and stderr kept per run
+# Stages of the long functions, with a first guess at their seconds per unit of work
+# until the run history has real timings. Units are songs unless noted.
+LOAD_STAGES = {
+    "load catalog": 0.05,
+    "extract vault": 2.0,
+    "open vault": 0.05,
+    "find strings and pointers": 0.05,
+    "write store": 0.2,
+}
+WRITE_STAGES = {
+    "load soundtrack": 0.1,
+    "extract vault": 2.0,
+    "patch strings": 0.01,
+    "adjust bin size": 0.05,
+    "pack vault": 2.0,
+    "extract stream headers": 2.0,
+    "convert audio": 2.0,  # per MB of unconverted audio on each worker
+    "install streams": 0.2,
+    "pack stream headers": 2.0,
+    "save soundtrack": 0.05,
+}
+RESET_STAGES = {
+    "restore vault": 0.2,
+    "restore stream headers": 0.2,
+    "find streams": 0.2,
+    "restore streams": 0.1,  # per file
+}
+EXPORT_STAGES = {
+    "load soundtrack": 0.1,
+    "hash sources": 0.01,  # per MB of source audio
+    "write zip": 0.02,  # per MB of source audio
+    "embed converted audio": 2.0,  # per MB of unconverted audio
+}
+
+log = get_logger("processing")
+
+def read_tail(stream, tail):
+    for line in iter(stream.readline, b""):
+        tail.append(line)
+    stream.close()
+
+def run_process(command, action, creationflags=0, canceled=None, **details):
+    # Runs an external tool and records it in the trace and the run history: wall
+    # and CPU time, peak memory, exit code and the last lines of its output.
+    # Returns (exit code, record); the exit code is None if canceled.
+    started = time.time()
+    command_line = subprocess.list2cmdline(command)
+    with span(action, "subprocess", command=command_line, **details) as args:
+        process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            creationflags=creationflags
+        )
+        # drained on their own threads so a chatty tool never blocks on a full pipe
+        tails = {name: deque(maxlen=OUTPUT_TAIL_LINES) for name in ("stdout", "stderr")}
+        readers = [
+            threading.Thread(target=read_tail, args=(getattr(process, name), tail), daemon=True)
+            for name, tail in tails.items()
+        ]
+        for reader in readers:
+            reader.start()
+
+        returncode = None
+        usage = (None, None, None)
+        while True:
+            try:
+                returncode, usage = wait_process(process, timeout=None if canceled is None else 0.25)
+                break
+            except subprocess.TimeoutExpired:
+                if canceled():
+                    process.kill()
+                    process.wait()
+                    args["canceled"] = True
+                    break
+        for reader in readers:
+            reader.join()
+
+        record = {
+            "started": started,
+            "action": action,
+            "command": command_line,
+            "background": int(details.get("background", False)),
+            "wall_s": time.time() - started,
+            "user_s": usage[0],
+            "sys_s": usage[1],
+            "max_rss": usage[2],
+            "returncode": returncode,
+            "stdout_tail": b"".join(tails["stdout"]).decode("utf-8", "replace"),
+            "stderr_tail": b"".join(tails["stderr"]).decode("utf-8", "replace"),
+        }
+        if "source" in details:
+            record["source"] = details["source"]
+            record["source_bytes"] = details.get("source_bytes")
+        args.update({
+            "returncode": returncode, "user_ms": round((usage[0] or 0) * 1000, 1),
+            "sys_ms": round((usage[1] or 0) * 1000, 1), "max_rss": usage[2] or 0,
+        })
+        if returncode:
+            args["stderr"] = record["stderr_tail"] or record["stdout_tail"]
 
-def run_external(command, action):
-    result = subprocess.run(command, creationflags=subprocess.CREATE_NO_WINDOW)
-    if result.returncode != 0:
-        raise RuntimeError(f"{action} failed with exit code {result.returncode}.")
-    return result
-
-def resolve_pointer_targets(ptrs, song, field):
-    song_ptrs = ptrs.get(song, None)
-    if song_ptrs is None:
+    try:
+        history.record_subprocess(record)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("Could not record %s in the run history: %s", action, e)
+    if returncode:
+        log.warning("%s exited with %s:\n%s", action, returncode, args["stderr"].rstrip())
+    return returncode, record
+
+def failure_detail(record):
+    # the tool's own last words, for error messages
+    output = (record["stderr_tail"] or record["stdout_tail"]).strip()
+    return f"\n\n{output.splitlines()[-1]}" if output else ""
+
+def run_external(command, action, canceled=None):
+    # Returns the exit code, or None if canceled
+    returncode, record = run_process(command, action, NO_WINDOW, canceled)
+    if returncode is None:
         return None
-    if song_ptrs == {}:
-        return []
-
-    overrides = song_ptrs.get("overrides", {})
-    if field in overrides:
-        return [overrides[field]]
-
-    direct_targets = song_ptrs.get("ptrs", {}).get(field, [])
-    if direct_targets:
-        return direct_targets
-
-    # Some rows do not expose their own pointer list; borrow from another row
-    # with the same original string value for this field.
-    field_value = song_ptrs.get("strings", {}).get(field)
-    for _, other in ptrs.items():
-        if other is song_ptrs:
-            continue
-        if other.get("strings", {}).get(field) != field_value:
-            continue
-        candidate = other.get("ptrs", {}).get(field, [])
-        if candidate:
-            return candidate
-
+    if returncode != 0:
+        raise RuntimeError(f"{action} failed with exit code {returncode}.{failure_detail(record)}")
+    return returncode
+
+def probe_source(path):
+    # Checks that sx can take a source; returns None if so, otherwise (reason, detail)
+    if not source_exists(path):
+        return ("missing", None)
+    if not path.lower().endswith(".mp3"):
+        return None
+    # codec check
+    try:
+        with open_source(path) as f:
+            audio = mutagen.File(f)
+    except Exception as e:
+        return ("unreadable", str(e))
+    if audio is None:
+        return ("no_metadata", None)
+    if audio.__class__.__name__ == "MP4":
+        return ("mp4a", None)
     return None
 
 def get_first_file(path):
@@ -54,30 +184,33 @@ def get_first_file(path):
                 return full_path
         return None  # No files found
     except Exception as e:
-        print(f"Error: {e}")
+        log.error("Could not list %s: %s", path, e)
         return None
 
-def load_pointers(settings, filename, set_progress=None):
-    if set_progress: set_progress(0, "Loading data from files...")
+@traced("load_pointers")
+def load_pointers(settings, filename, set_progress=None, canceled=None):
+    progress = ProgressPlan("load_pointers", LOAD_STAGES, set_progress)
+    progress.stage("load catalog", "Loading data from files...")
     
-    # Load JSON file
-    with open(resource_path("defaults.json"), 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    catalog = SongCatalog.load()
 
-    if set_progress: set_progress(5, "Extracting string data...")
+    progress.stage("extract vault", "Extracting string data...")
 
     # Extract data vault
     if "game" in settings.keys() and os.path.isdir(settings["game"]):
         binLoc = os.path.join(settings["game"], 'SOUND', 'BURNOUTGLOBALDATA.BIN')
         tempLoc = os.path.join('temp', 'globaldata')
         shutil.rmtree(tempLoc, ignore_errors=True)
-        run_external([settings["yap"], 'e', binLoc, tempLoc], "YAP extract (global data)")
+        # the one slow step of a scan, so closing BPSS doesn't have to wait it out
+        run_external([settings["yap"], 'e', binLoc, tempLoc], "YAP extract (global data)", canceled)
+        if canceled and canceled():
+            return
     else:
-        print("failing out")
+        log.warning("No Burnout Paradise installation at %r", settings.get("game"))
         if set_progress: set_progress(100, "Failed to find Burnout Paradise installation!")
         return
 
-    if set_progress: set_progress(10, "Navigating string data...")
+    progress.stage("open vault", "Navigating string data...")
 
     # Create a navigator
     vaultLoc = os.path.join(tempLoc, 'AttribSysVault')
@@ -89,181 +222,153 @@ def load_pointers(settings, filename, set_progress=None):
     # Find the pointer to strings
     navigator.seek(0x08)
     offset = navigator.read_uint32('<')
-    print(offset)
     bin_size = navigator.read_uint32('<')
-    print(bin_size)
+    log.debug("String table at 0x%X, %d bytes", offset, bin_size)
 
     # now find the ptr base
     navigator.find("NrtP")
     ptr_base = navigator.loc()
-    out = {}
-    for s in data.keys():
-        out[s] = {}
+    out = {s: {} for s in catalog.keys}
 
-    if set_progress: set_progress(20, "Finding strings...")
+    progress.stage("find strings and pointers", "Finding strings...", units=len(catalog))
+    found_songs = 0
     # start consuming tokens
     navigator.seek(offset)
     while (navigator.loc() < offset + bin_size):
         song_pos = navigator.loc()
         song = navigator.read_cstring()
-        if song in data:
-            match data[song]["type"]:
-                case 0: # regular soundtrack
-                    match data[song]["lock"]:
-                        case 0: # no lock
-                            stream_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist_pos = navigator.loc()
-                            artist = navigator.read_cstring()
-                            album_pos = navigator.loc()
-                            album = navigator.read_cstring()
-                        case 1: # no album (FRICTION)
-                            stream_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist_pos = navigator.loc()
-                            artist = navigator.read_cstring()
-                            # check for the almighty empty string
-                            temp_pos = navigator.loc()
-                            album = navigator.read_cstring()
-                            if album == data[song]["defaults"]["album"]:
-                                album_pos = temp_pos
-                            else:
-                                album = ""
-                                album_pos = 0
-                                navigator.seek(temp_pos)
-                        case 3: # artist/album sync
-                            stream_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist_pos = navigator.loc()
-                            album_pos = navigator.loc()
-                            artist = navigator.read_cstring()
-                            album = artist
-                        case 6: # stream/artist sync
-                            stream_pos = navigator.loc()
-                            artist_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist = stream
-                            album_pos = navigator.loc()
-                            album = navigator.read_cstring()
-                        case 7: # stream/artist/album sync
-                            stream_pos = navigator.loc()
-                            artist_pos = navigator.loc()
-                            album_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist = stream
-                            album = stream
-                        case 9: # song/album sync
-                            stream_pos = navigator.loc()
-                            stream = navigator.read_cstring()
-                            artist_pos = navigator.loc()
-                            artist = navigator.read_cstring()
-                            album_pos = song_pos
-                            album = song
-                case 1: # burnout soundtrack
-                    # get stream name
-                    stream_pos = navigator.loc()
-                    stream = navigator.read_cstring()
-                    # save pos, check for more
-                    temp_pos = navigator.loc()
-                    artist = navigator.read_cstring()
-                    if artist == data[song]["defaults"]["artist"]:
-                        artist_pos = temp_pos
-                    else:
-                        artist = data[song]["defaults"]["artist"]
-                        artist_pos = 0
-                        navigator.seek(temp_pos)
-                    temp_pos = navigator.loc()
-                    album = navigator.read_cstring()
-                    if album == data[song]["defaults"]["album"]:
-                        album_pos = temp_pos
-                    else:
-                        album = data[song]["defaults"]["album"]
-                        album_pos = 0
-                        navigator.seek(temp_pos)
-                case 2: # classical soundtrack
-                    stream_pos = navigator.loc()
-                    stream = navigator.read_cstring()
-                    # save pos, check for artist
-                    temp_pos = navigator.loc()
-                    artist = navigator.read_cstring()
-                    if artist == data[song]["defaults"]["artist"]:
-                        artist_pos = temp_pos
-                    else:
-                        artist = data[song]["defaults"]["artist"]
-                        artist_pos = 0
-                        navigator.seek(temp_pos)
-                    # check for the almighty empty string
-                    temp_pos = navigator.loc()
-                    album = navigator.read_cstring()
-                    if album == data[song]["defaults"]["album"]:
-                        album_pos = temp_pos
-                    else:
-                        album = data[song]["defaults"]["album"]
-                        album_pos = 0
-                        navigator.seek(temp_pos)
-            out[song]["strings"] = {"title":song, "stream":stream, "artist":artist, "album":album}
-            out[song]["locs"] = {"title":song_pos, "stream":stream_pos, "artist":artist_pos, "album":album_pos}
+        if song in catalog:
+            if canceled and canceled():
+                # leave the store alone so the next start scans again
+                navigator.close()
+                return
+            default = catalog.defaults(song)
+            strings = {"title": song}
+            locs = {"title": song_pos}
+            for step in catalog.layout(song):
+                match step:
+                    case ("read", field):
+                        locs[field] = navigator.loc()
+                        strings[field] = navigator.read_cstring()
+                    case ("alias", field, other):
+                        locs[field] = locs[other]
+                        strings[field] = strings[other]
+                    case ("optional", field):
+                        # only there if it still holds the default, otherwise it is another song's
+                        temp_pos = navigator.loc()
+                        value = navigator.read_cstring()
+                        if value == default[field]:
+                            locs[field] = temp_pos
+                            strings[field] = value
+                        else:
+                            locs[field] = 0
+                            strings[field] = default[field]
+                            navigator.seek(temp_pos)
+            out[song]["strings"] = {field: strings[field] for field in FIELDS}
+            out[song]["locs"] = {field: locs[field] for field in FIELDS}
             # get pointers
 
-            if set_progress: set_progress(60, "Finding pointers...")
-
             temp_pos = navigator.loc()
-            for pos in [song_pos, stream_pos, artist_pos, album_pos]:
-                if pos != 0:
+            # aliased fields share a location, so each location is only searched once
+            found = {0: []}
+            for field in FIELDS:
+                pos = locs[field]
+                if pos not in found:
                     prefix = bytes.fromhex('03 00 01 00')
                     pos_bytes = struct.pack('<I', pos - offset)
                     search_string = prefix + pos_bytes
-                    locs = navigator.find_all(search_string, start=0, hex=True)
-                    if pos == song_pos:
-                        song_ptr = [loc + 4 for loc in locs]
-                    if pos == stream_pos:
-                        stream_ptr = [loc + 4 for loc in locs]
-                    if pos == artist_pos:
-                        artist_ptr = [loc + 4 for loc in locs]
-                    if pos == album_pos:
-                        album_ptr = [loc + 4 for loc in locs]
-                else:
-                    if pos == song_pos:
-                        song_ptr = []
-                    if pos == stream_pos:
-                        stream_ptr = []
-                    if pos == artist_pos:
-                        artist_ptr = []
-                    if pos == album_pos:
-                        album_ptr = []
+                    found[pos] = [loc + 4 for loc in navigator.find_all(search_string, start=0, hex=True)]
             navigator.seek(temp_pos)
-            out[song]["ptrs"] = {"title":song_ptr, "stream":stream_ptr, "artist":artist_ptr, "album":album_ptr}
+            out[song]["ptrs"] = {field: list(found[locs[field]]) for field in FIELDS}
             # out[song]["source"] = ""
+            found_songs += 1
+            progress.advance(found_songs, len(catalog), f"Finding pointers for \"{song}\"...")
 
-    if set_progress: set_progress(90, "Writing pointer data...")
+    progress.stage("write store", "Writing pointer data...")
 
-    # Save the modified JSON back to file
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(out, f, indent=4, ensure_ascii=False)
+    # Hand the pointers to the shared store, which writes them out
+    PointerStore.open(filename).replace(out)
 
     navigator.close()
-    if set_progress: set_progress(100, "Done!")
+    progress.finish("Done!")
+
+
+def patch_strings(navigator, offset, st, store, catalog, progress=None):
+    # Appends every string the soundtrack changes to the end of the vault and points
+    # that field's pointers at it. Returns the (song, field) pairs with no pointer data.
+
+    # put a null character to give us space
+    navigator.seek_end()
+    navigator.write_bytes(b'\x00')
+
+    count = 0
+    written_pointers = []
+    unresolved_pointer_fields = []
+    for s in st.keys():
+        log.debug("Writing data for %s", s)
+        if progress: progress.advance(count, len(st), f"Writing strings for \"{st[s]['strings']['title']}\"...")
+        # get defaults
+        default = catalog.defaults(s)
+        # if something differs between default and soundtrack, write it to the end of the vault and point the pointer to it
+        for k in default.keys():
+            if (st[s]["strings"][k] != default[k]):
+                navigator.seek_end()
+                loc = navigator.loc()
+                # print("got eof " + str(loc))
+                navigator.write_cstring(st[s]["strings"][k])
+                pointer_targets = store.targets(s, k)
+                if pointer_targets is None:
+                    unresolved_pointer_fields.append((s, k))
+                    continue
 
+                for x in pointer_targets:
+                    if x not in written_pointers:
+                        navigator.seek(x)
+                        navigator.write_bytes((loc - offset).to_bytes(4, 'little'))
+                        written_pointers.append(x)
+        count += 1
+    return unresolved_pointer_fields
 
-def write_pointers(settings, soundtrack, pointers, set_progress=None):
+@traced("write_pointers")
+def write_pointers(settings, soundtrack, pointers, set_progress=None, canceled=None):
     if not soundtrack:
         if set_progress: set_progress(100, "Nothing to apply.")
         return
-    if set_progress: set_progress(0, "Loading data from files...")
-
-    # Establish thread in case we want to cancel later
-    thread = QThread.currentThread()
+    progress = ProgressPlan("write_pointers", WRITE_STAGES, set_progress)
+    progress.stage("load soundtrack", "Loading data from files...")
     
     with open(soundtrack, 'r', encoding='utf-8') as f:
         st = json.load(f)
     
-    with open(pointers, 'r', encoding='utf-8') as f:
-        ptrs = json.load(f)
+    store = PointerStore.open(pointers)
+    if not store.exists():
+        raise FileNotFoundError(f"Pointers file \"{store.path}\" not found. Try pressing Reset.")
 
-    with open(resource_path("defaults.json"), 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    catalog = SongCatalog.load()
+
+    # songs to convert, as [source, stream, song, source hash]
+    to_convert = []
+    for s in st.keys():
+        source = st[s].get("zip", None) or st[s]["source"]
+        if source:
+            to_convert.append([source, st[s]["strings"]["stream"].upper(), s, st[s].get("hash")])
+
+    # Conversion dominates an apply, so its share of the progress bar follows the
+    # audio sx still has to convert. The cost model is recent sx seconds per byte.
+    workers = max(1, min((os.cpu_count() or 1) - 2, len(to_convert)))
+    sizes = {id(s): conversion_bytes(s[0], s[3]) for s in to_convert}
+    total_bytes = sum(sizes.values())
+    try:
+        seconds_per_byte = history.sx_seconds_per_byte()
+    except (OSError, sqlite3.Error):
+        seconds_per_byte = None
+    progress.expect(
+        "convert audio", units=total_bytes / (1024 * 1024) / workers,
+        seconds=total_bytes * seconds_per_byte / workers if seconds_per_byte else None
+    )
+    progress.expect("install streams", units=len(to_convert))
 
-    if set_progress: set_progress(3, "Locating string data...")
+    progress.stage("extract vault", "Locating string data...")
 
     # get some paths
     binLoc = os.path.join(settings["game"], 'SOUND', 'BURNOUTGLOBALDATA.BIN')
@@ -271,7 +376,10 @@ def write_pointers(settings, soundtrack, pointers, set_progress=None):
 
     # get fresh strings vault
     shutil.rmtree(tempLoc, ignore_errors=True)
-    run_external([settings["yap"], 'e', binLoc, tempLoc], "YAP extract (global data)")
+    run_external([settings["yap"], 'e', binLoc, tempLoc], "YAP extract (global data)", canceled)
+    if canceled and canceled():
+        if set_progress: set_progress(100, "Apply action canceled.")
+        return
 
     # create navigator
     vaultLoc = os.path.join(tempLoc, 'AttribSysVault')
@@ -280,60 +388,23 @@ def write_pointers(settings, soundtrack, pointers, set_progress=None):
         raise RuntimeError("YAP extract completed, but no AttribSysVault file was found.")
     navigator = HexNavigator(vault_file)
 
-    if set_progress: set_progress(8, "Beginning data write...")
+    progress.stage("patch strings", "Beginning data write...", units=len(st))
 
     # Find the pointer to strings
     navigator.seek(0x08)
     offset = navigator.read_uint32('<')
-    to_convert = []
 
-    # put a null character to give us space
-    navigator.seek_end()
-    navigator.write_bytes(b'\x00')
-
-    steps = len(st.keys()) or 1
-    step = 20 / steps
-    count = 0
-    written_pointers = []
-    unresolved_pointer_fields = []
-    for s in st.keys():
-        print(f"writing data for {s}")
-        if set_progress: set_progress(int((step * count) + 10), f"Writing strings for \"{st[s]['strings']['title']}\"...")
-        # get defaults
-        default = data[s]["defaults"]
-        # if something differs between default and soundtrack, write it to the end of the vault and point the pointer to it
-        for k in default.keys():
-            if (st[s]["strings"][k] != default[k]):
-                navigator.seek_end()
-                loc = navigator.loc()
-                # print("got eof " + str(loc))
-                navigator.write_cstring(st[s]["strings"][k])
-                pointer_targets = resolve_pointer_targets(ptrs, s, k)
-                if pointer_targets is None:
-                    unresolved_pointer_fields.append((s, k))
-                    continue
-
-                for x in pointer_targets:
-                    if x not in written_pointers:
-                        navigator.seek(x)
-                        navigator.write_bytes((loc - offset).to_bytes(4, 'little'))
-                        written_pointers.append(x)
-        # add to conversion queue
-        if st[s].get("zip", None):
-            to_convert.append([st[s]["zip"], st[s]["strings"]["stream"].upper(), s])
-        elif st[s]["source"]:
-            to_convert.append([st[s]["source"], st[s]["strings"]["stream"].upper(), s])
-        count += 1
+    unresolved_pointer_fields = patch_strings(navigator, offset, st, store, catalog, progress)
 
     if unresolved_pointer_fields:
         examples = ", ".join([f"{song}:{field}" for song, field in unresolved_pointer_fields[:4]])
         raise RuntimeError(
             "Could not apply some edited strings because pointer data is missing. "
             f"Missing fields: {examples}. "
-            f"Delete \"{pointers}\" and reopen BPSS to regenerate pointers, then apply again."
+            f"Delete \"{store.path}\" and reopen BPSS to regenerate pointers, then apply again."
         )
 
-    if set_progress: set_progress(30, "Adjusting bin size...")
+    progress.stage("adjust bin size", "Adjusting bin size...")
 
     # finally, adjust bin size
     navigator.seek_end()
@@ -343,7 +414,7 @@ def write_pointers(settings, soundtrack, pointers, set_progress=None):
     # now everything is written, let's pack it up
     navigator.close()
 
-    if set_progress: set_progress(35, "Packing bin...")
+    progress.stage("pack vault", "Packing bin...")
 
     # first turn the bin into bin.old if one doesn't exist already
     backupLoc = binLoc + '.old'
@@ -351,50 +422,66 @@ def write_pointers(settings, soundtrack, pointers, set_progress=None):
         shutil.move(binLoc, backupLoc)
 
     # create at the location of the bin
-    run_external([settings["yap"], 'c', tempLoc, binLoc], "YAP pack (global data)")
+    run_external([settings["yap"], 'c', tempLoc, binLoc], "YAP pack (global data)", canceled)
+    if canceled and canceled():
+        if set_progress: set_progress(100, "Apply action canceled. Changes may be partially applied.")
+        return
 
-    if set_progress: set_progress(40, "Unpacking stream headers...")
+    progress.stage("extract stream headers", "Unpacking stream headers...")
 
     # now that the song strings are written, let's convert the songs and update stream headers
     # start by unpacking streamheaders
     headersLoc = os.path.join(settings["game"], "SOUND", "STREAMS", "STREAMHEADERS.BUNDLE")
     tempLoc = os.path.join("temp", "streamheaders")
     shutil.rmtree(tempLoc, ignore_errors=True)
-    run_external([settings["yap"], 'e', headersLoc, tempLoc], "YAP extract (stream headers)")
+    run_external([settings["yap"], 'e', headersLoc, tempLoc], "YAP extract (stream headers)", canceled)
+    if canceled and canceled():
+        if set_progress: set_progress(100, "Apply action canceled. Changes may be partially applied.")
+        return
 
-    steps = len(to_convert) or 1
-    step = (50 / steps)
     if to_convert:
-        workers = max(1, (os.cpu_count() or 1) - 2)
-        workers = min(workers, len(to_convert))
-
-        if set_progress: set_progress(45, f"Converting audio with {workers} threads...")
+        progress.stage(
+            "convert audio", f"Converting audio with {workers} threads...",
+            songs=len(to_convert), workers=workers, megabytes=round(total_bytes / (1024 * 1024), 1)
+        )
+        if seconds_per_byte:
+            log.info("Estimated conversion time: %.1f s of sx work", total_bytes * seconds_per_byte)
 
         with ThreadPoolExecutor(max_workers=workers) as executor:
+            # longest conversions first, so the pool isn't left waiting on one big file at the end
             future_to_song = {
-                executor.submit(convertSong, s[0], s[1], settings): s
-                for s in to_convert
+                executor.submit(profiled(convertSong), s[0], s[1], settings, s[3], canceled): s
+                for s in sorted(to_convert, key=lambda s: sizes[id(s)], reverse=True)
             }
             converted = 0
+            converted_bytes = 0
             for future in as_completed(future_to_song):
-                if thread.isInterruptionRequested():
+                if canceled and canceled():
+                    # leave the queued conversions unstarted, or leaving the block waits on them
+                    executor.shutdown(cancel_futures=True)
                     if set_progress: set_progress(100, "Apply action canceled. Changes may be partially applied.")
                     return
                 s = future_to_song[future]
                 future.result()
                 converted += 1
-                if set_progress:
-                    set_progress(min(94, int((step * converted) + 45)), f"Converted \"{st[s[2]]['strings']['title']}\"...")
-
+                converted_bytes += sizes[id(s)]
+                # each song also counts as one byte, so cached songs still move the bar
+                progress.advance(
+                    converted_bytes + converted, total_bytes + len(to_convert),
+                    f"Converted \"{st[s[2]]['strings']['title']}\"..."
+                )
+
+    progress.stage("install streams", "Updating streams...", trace=False)
     count = 0
     for s in to_convert:
-        if thread.isInterruptionRequested():
+        if canceled and canceled():
             if set_progress: set_progress(100, "Apply action canceled. Changes may be partially applied.")
             return
-        if set_progress: set_progress(int((step * count) + 45), f"Updating \"{st[s[2]]['strings']['title']}\"...")
+        progress.advance(count, len(to_convert), f"Updating \"{st[s[2]]['strings']['title']}\"...")
+        stage(f"install {s[1]}", "install", song=s[2])
         # get the .snr file, then write those contents at 0x10 of the corresponding data file
-        snr_path = os.path.join("temp", s[1] + ".SNR")
-        dat_path = os.path.join(tempLoc, "GenericRwacWaveContent", data[s[2]]["id"].upper() + ".dat")
+        snr_path = os.path.join("temp", s[1] + ".snr")
+        dat_path = os.path.join(tempLoc, "GenericRwacWaveContent", catalog.stream_id(s[2]).upper() + ".dat")
         # get snr data
         with open(snr_path, 'rb') as f:
             snr_data = f.read()
@@ -416,25 +503,28 @@ def write_pointers(settings, soundtrack, pointers, set_progress=None):
         count += 1
     # write original streamheaders to .old
     # repack streamheaders
-    if set_progress: set_progress(95, "Packing stream headers...")
+    progress.stage("pack stream headers", "Packing stream headers...")
 
     backupHeaders = headersLoc + ".old"
     if not os.path.exists(backupHeaders):
         shutil.move(headersLoc, backupHeaders)
-    run_external([settings["yap"], 'c', tempLoc, headersLoc], "YAP pack (stream headers)")
+    run_external([settings["yap"], 'c', tempLoc, headersLoc], "YAP pack (stream headers)", canceled)
+    if canceled and canceled():
+        if set_progress: set_progress(100, "Apply action canceled. Changes may be partially applied.")
+        return
 
     # save edits to st too
+    progress.stage("save soundtrack", "Saving soundtrack...")
     with open(soundtrack, 'w', encoding='utf-8') as f:
         json.dump(st, f, indent=4, ensure_ascii=False)
 
-    if set_progress: set_progress(100, "Done!")
+    progress.finish("Done!")
 
-def reset_files(settings, set_progress=None):
+@traced("reset_files")
+def reset_files(settings, set_progress=None, canceled=None):
     changed = False
-    if set_progress: set_progress(0, "Restoring strings...")
-
-    # Establish thread in case we want to cancel later
-    thread = QThread.currentThread()
+    progress = ProgressPlan("reset_files", RESET_STAGES, set_progress)
+    progress.stage("restore vault", "Restoring strings...")
 
     # search for restore .old files at locations we'd expect them
     if "game" in settings.keys() and os.path.isdir(settings["game"]):
@@ -445,20 +535,20 @@ def reset_files(settings, set_progress=None):
 
     backupLoc = binLoc + '.old'
     if os.path.exists(backupLoc):
-        print(f"Restoring {binLoc}")
+        log.info("Restoring %s", binLoc)
         shutil.move(backupLoc, binLoc)
         changed = True
 
-    if set_progress: set_progress(10, "Restoring stream headers...")
+    progress.stage("restore stream headers", "Restoring stream headers...")
 
     headersLoc = os.path.join(settings["game"], "SOUND", "STREAMS", "STREAMHEADERS.BUNDLE")
     backupHeaders = headersLoc + ".old"
     if os.path.exists(backupHeaders):
-        print(f"Restoring {headersLoc}")
+        log.info("Restoring %s", headersLoc)
         shutil.move(backupHeaders, headersLoc)
         changed = True
 
-    if set_progress: set_progress(20, "Scanning audio files...")
+    progress.stage("find streams", "Scanning audio files...")
 
     # look for files
     snsLoc = os.path.join(settings["game"], "SOUND", "STREAMS")
@@ -466,7 +556,7 @@ def reset_files(settings, set_progress=None):
     for dirpath, _, filenames in os.walk(snsLoc):
         for filename in filenames:
             if filename.endswith('.old'):
-                if thread.isInterruptionRequested():
+                if canceled and canceled():
                     if set_progress: set_progress(100, "Reset action canceled. Changes may be partially applied.")
                     return
                 original_name = filename[:-4]
@@ -475,85 +565,436 @@ def reset_files(settings, set_progress=None):
                 if os.path.exists(new_path):
                     file_queue.append((old_path, new_path))
 
-    step = 75 / (len(file_queue) or 1)
+    progress.stage("restore streams", "Restoring audio files...", units=len(file_queue), trace=False)
     count = 0
     for old_path, new_path in file_queue:
-        if set_progress: set_progress(int((step * count) + 25), f"Restoring \"{new_path}\"...")
-        print(f"Restoring {new_path}")
+        progress.advance(count, len(file_queue), f"Restoring \"{new_path}\"...")
+        stage(f"restore {os.path.basename(new_path)}", "install")
+        log.info("Restoring %s", new_path)
         shutil.move(old_path, new_path)
         changed = True
         count += 1
 
-    end_message = "Done!" if changed else "Nothing to revert."
-    if set_progress: set_progress(100, end_message)
+    progress.finish("Done!" if changed else "Nothing to revert.")
 
 
-def convertSong(file, stream, settings):
-    source_path = require_path_rules(os.path.abspath(file), "Source file")
-    temp_path = os.path.abspath(os.path.join("temp", stream))
-    sx_path = os.path.abspath(settings["audio"])
-    temp_snr = temp_path + ".snr"
-    temp_sns = temp_path + ".sns"
+def sx_cache_paths(source_hash):
+    return (
+        os.path.join(SX_CACHE_DIR, source_hash + ".snr"),
+        os.path.join(SX_CACHE_DIR, source_hash + ".sns"),
+    )
 
-    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-    os.makedirs(SX_CACHE_DIR, exist_ok=True)
+def is_cached(source_hash):
+    cached_snr, cached_sns = sx_cache_paths(source_hash)
+    return os.path.exists(cached_snr) and os.path.exists(cached_sns)
 
-    source_hash = hash_file(source_path)
-    cached_snr = os.path.join(SX_CACHE_DIR, source_hash + ".snr")
-    cached_sns = os.path.join(SX_CACHE_DIR, source_hash + ".sns")
+def convert_to_cache(source_path, settings, source_hash=None, background=False, canceled=None):
+    # Runs sx on source_path and stores the result in the SX cache, keyed by the
+    # source hash. Returns the cached (.snr, .sns) paths, or None if canceled.
+    source_hash = source_hash or hash_file(source_path)
+    cached_snr, cached_sns = sx_cache_paths(source_hash)
+    with span("sx cache lookup", "cache", hash=source_hash) as args:
+        args["hit"] = is_cached(source_hash)
+    if args["hit"]:
+        return cached_snr, cached_sns
 
-    if os.path.exists(cached_snr) and os.path.exists(cached_sns):
-        shutil.copy2(cached_snr, temp_snr)
-        shutil.copy2(cached_sns, temp_sns)
-        return
+    sx_path = os.path.abspath(settings["audio"])
+    os.makedirs(SX_CACHE_DIR, exist_ok=True)
+    os.makedirs(SX_WORK_DIR, exist_ok=True)
 
-    result = subprocess.run(
-        [sx_path, '-sndplayer', '-ealayer3_int', '-vbr100', '-playlocstream', source_path, f"-={temp_path}"],
-        creationflags=subprocess.CREATE_NO_WINDOW
-    )
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"sx failed with exit code {result.returncode} while converting \"{os.path.basename(source_path)}\"."
-        )
+    # sx writes next to its output stem, so give every run its own directory;
+    # background and apply conversions of the same file may overlap.
+    work_dir = tempfile.mkdtemp(prefix=source_hash[:8] + "_", dir=SX_WORK_DIR)
+    work_path = os.path.abspath(os.path.join(work_dir, "out"))
+    flags = NO_WINDOW
+    if background:
+        flags |= getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)
 
-    if not os.path.exists(temp_snr) or not os.path.exists(temp_sns):
-        raise RuntimeError(
-            f"sx did not produce expected output for \"{os.path.basename(source_path)}\". "
-            "Try a shorter path or placing the file in a directory without any special characters."
+    try:
+        returncode, record = run_process(
+            [sx_path, *SX_ARGS, source_path, f"-={work_path}"], "sx", flags, canceled,
+            source=os.path.basename(source_path), source_bytes=os.path.getsize(source_path), background=background
         )
-
-    if not os.path.exists(cached_snr):
-        try:
-            shutil.copy2(temp_snr, cached_snr)
-        except OSError:
-            pass
-    if not os.path.exists(cached_sns):
+        if returncode is None:
+            return None
+        if returncode != 0:
+            raise RuntimeError(
+                f"sx failed with exit code {returncode} while converting \"{os.path.basename(source_path)}\".{failure_detail(record)}"
+            )
+
+        if not os.path.exists(work_path + ".snr") or not os.path.exists(work_path + ".sns"):
+            raise RuntimeError(
+                f"sx did not produce expected output for \"{os.path.basename(source_path)}\". "
+                "Try a shorter path or placing the file in a directory without any special characters."
+            )
+
+        # .snr goes in last since its presence is what marks the entry complete
         try:
-            shutil.copy2(temp_sns, cached_sns)
+            os.replace(work_path + ".sns", cached_sns)
+            os.replace(work_path + ".snr", cached_snr)
         except OSError:
-            pass
+            # another conversion of the same file may have won the race
+            if not is_cached(source_hash):
+                raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return cached_snr, cached_sns
+
+def convert_source(source, settings, source_hash=None, background=False, canceled=None):
+    # Like convert_to_cache, but source may also point inside a zip. Zip members
+    # are identified by the hash recorded for them, and only extracted to a
+    # scratch file for as long as sx needs it when they aren't cached yet.
+    source_path = require_path_rules(os.path.abspath(source), "Source file")
+    if not split_zip_path(source_path):
+        return convert_to_cache(source_path, settings, background=background, canceled=canceled)
+
+    source_hash = source_hash or hash_file(source_path)
+    with span("sx cache lookup", "cache", hash=source_hash) as args:
+        args["hit"] = is_cached(source_hash)
+    if args["hit"]:
+        return sx_cache_paths(source_hash)
+
+    os.makedirs(SX_WORK_DIR, exist_ok=True)
+    handle, scratch = tempfile.mkstemp(suffix=os.path.splitext(source_path)[1].lower(), dir=SX_WORK_DIR)
+    os.close(handle)
+    try:
+        copy_source(source_path, scratch, source_hash)
+        return convert_to_cache(os.path.abspath(scratch), settings, source_hash, background, canceled)
+    finally:
+        os.remove(scratch)
+
+def conversion_bytes(source, source_hash=None):
+    # Bytes sx still has to convert for source: none if it is cached. Unreadable
+    # sources count as nothing here and fail properly when they are converted.
+    if source_hash and is_cached(source_hash):
+        return 0
+    try:
+        return source_size(os.path.abspath(source))
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return 0
+
+def convertSong(file, stream, settings, source_hash=None, canceled=None):
+    temp_path = os.path.abspath(os.path.join("temp", stream))
+    temp_snr = temp_path + ".snr"
+    temp_sns = temp_path + ".sns"
+
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+
+    cached = convert_source(file, settings, source_hash, canceled=canceled)
+    if cached is None:
+        return
+    cached_snr, cached_sns = cached
+    shutil.copy2(cached_snr, temp_snr)
+    shutil.copy2(cached_sns, temp_sns)
     
 
-def export_files(settings, filename, export_path, set_progress=None):
-    if set_progress: set_progress(0, "Exporting soundtrack...")
-    with zipfile.ZipFile(export_path, "w", zipfile.ZIP_DEFLATED) as z:
-        z.write(filename, os.path.basename(filename))
+def sx_payload_name(source_hash, ext):
+    return f"{SX_PAYLOAD_DIR}/{SX_PROFILE}/{source_hash}{ext}"
 
-        if set_progress: set_progress(10, "Loading paths...")
+def seed_sx_cache(z, canceled=None):
+    # Copies pre-converted payloads from an exported zip into the SX cache.
+    # Payloads made with a different encoder profile are left alone.
+    payloads = {}
+    for name in z.namelist():
+        match = SX_PAYLOAD_RE.fullmatch(name.replace("\\", "/"))
+        if match and match.group(1) == SX_PROFILE:
+            payloads.setdefault(match.group(2), {})[match.group(3).lower()] = name
 
-        with open(filename, 'r', encoding='utf-8') as f:
-            st = json.load(f)
+    os.makedirs(SX_CACHE_DIR, exist_ok=True)
+    seeded = 0
+    for source_hash, members in payloads.items():
+        if canceled and canceled():
+            break
+        if ".snr" not in members or ".sns" not in members or is_cached(source_hash):
+            continue
+        cached_snr, cached_sns = sx_cache_paths(source_hash)
+        # .snr goes in last since its presence is what marks the entry complete
+        for ext, cached in ((".sns", cached_sns), (".snr", cached_snr)):
+            partial = cached + ".part"
+            try:
+                with z.open(members[ext]) as src, open(partial, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(partial, cached)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        seeded += 1
+    return seeded
+
+def copy_source(source_path, dest_path, expected_hash=None, set_progress=None):
+    # Streams a source (plain or inside a zip) to dest_path, checking its hash.
+    # zipfile checks member CRCs as it reads; the hash covers the rest.
+    digest = hashlib.sha256()
+    with open_source(source_path) as src, open(dest_path, "wb") as dst:
+        while True:
+            chunk = src.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            if set_progress: set_progress(len(chunk))
+    if expected_hash and digest.hexdigest() != expected_hash:
+        raise RuntimeError(f"\"{os.path.basename(source_path)}\" is corrupt (hash mismatch).")
+    return digest.hexdigest()
+
+def import_zip(zip_path, set_progress=None, canceled=None):
+    # Imports an exported soundtrack zip and returns the path of its .soundtrack,
+    # or None if canceled. Nothing is written until the zip has been checked.
+    # Audio stays in the zip: sources point inside it and are only read when they
+    # need converting, so the zip has to stay where it was imported from.
+    if set_progress: set_progress(0, "Opening zip file...")
+    zip_name = os.path.splitext(os.path.basename(zip_path))[0]
+    with zipfile.ZipFile(zip_path, "r") as z:
+        infos = {}
+        for info in z.infolist():
+            if not info.is_dir():
+                infos[info.filename.replace("\\", "/").lstrip("./")] = info
+        candidates = [name for name in infos if "/" not in name and name.lower().endswith(".soundtrack")]
+        if not candidates:
+            raise RuntimeError(f"\"{os.path.basename(zip_path)}\" does not contain a valid .soundtrack file.")
+        soundtrack_member = candidates[0]
+        st = json.loads(z.read(infos[soundtrack_member]).decode("utf-8"))
+
+        if set_progress: set_progress(5, "Checking audio files...")
+
+        # zips from older versions don't record hashes, so those have to be read once
+        members = {}
+        for s in st.keys():
+            if st[s].get("zip"):
+                member = os.path.basename(st[s]["zip"].replace("\\", "/"))
+                if member not in infos:
+                    raise RuntimeError(f"\"{os.path.basename(zip_path)}\" is missing \"{member}\" for \"{s}\".")
+                if st[s].get("hash") or member not in members:
+                    members[member] = st[s].get("hash")
+
+        unhashed = [member for member, source_hash in members.items() if not source_hash]
+        total = sum(infos[member].file_size for member in unhashed) or 1
+        done = 0
+        def member_progress(n):
+            nonlocal done
+            done += n
+            if set_progress: set_progress(int(done / total * 85) + 5, "")
+
+        for member in unhashed:
+            if canceled and canceled():
+                if set_progress: set_progress(100, "Import canceled.")
+                return None
+            if set_progress: set_progress(int(done / total * 85) + 5, f"Checking \"{member}\"...")
+            with z.open(infos[member]) as src:
+                members[member] = hash_stream(src, member_progress)
 
-        step = 90 / (len(st.keys()) or 1)
-        count = 0
         for s in st.keys():
-            if set_progress: set_progress(int((step * count) + 10), f"Exporting \"{st[s]['strings']['title']}\"...")
-            if st[s]["source"]:
-                source_path = st[s]["source"]
-                z.write(source_path, os.path.basename(source_path))
-            count += 1
+            if st[s].get("zip"):
+                member = os.path.basename(st[s]["zip"].replace("\\", "/"))
+                st[s]["hash"] = members[member]
+                st[s]["zip"] = os.path.join(os.path.abspath(zip_path), member)
+
+        if set_progress: set_progress(90, "Importing converted audio...")
+        seed_sx_cache(z, canceled)
+        if canceled and canceled():
+            if set_progress: set_progress(100, "Import canceled.")
+            return None
+
+    soundtrack_dir = os.path.join(SOUNDTRACKS_DIR, zip_name)
+    os.makedirs(soundtrack_dir, exist_ok=True)
+    soundtrack_path = os.path.join(soundtrack_dir, soundtrack_member)
+    with open(soundtrack_path, "w", encoding="utf-8") as f:
+        json.dump(st, f, indent=2)
 
-        if set_progress: set_progress(100, "Done!")
+    if set_progress: set_progress(100, "Done!")
+    return soundtrack_path
+
+def export_member_name(source_path, taken):
+    # Picks a unique archive name for source_path, keeping its basename if possible
+    stem, ext = os.path.splitext(os.path.basename(source_path))
+    name = stem + ext
+    n = 2
+    while name.lower() in taken:
+        name = f"{stem} ({n}){ext}"
+        n += 1
+    taken.add(name.lower())
+    return name
+
+def deflate_to_file(source_path, raw_path):
+    # Raw-deflates source_path into raw_path, returning (crc, size, compressed size)
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    crc = 0
+    size = 0
+    with open_source(source_path) as src, open(raw_path, "wb") as dst:
+        while True:
+            chunk = src.read(1024 * 1024)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            dst.write(compressor.compress(chunk))
+        dst.write(compressor.flush())
+        return crc, size, dst.tell()
+
+def source_zipinfo(source_path, name):
+    if split_zip_path(source_path):
+        zinfo = zipfile.ZipInfo(name, time.localtime()[:6])
+        zinfo.external_attr = 0o644 << 16
+        zinfo.file_size = source_size(source_path)
+        return zinfo
+    return zipfile.ZipInfo.from_file(source_path, name)
+
+@traced("export_files")
+def export_files(settings, filename, export_path, set_progress=None, canceled=None):
+    # Writes the soundtrack and its audio to a zip at export_path. If canceled,
+    # the half-written zip is removed again.
+    # The .soundtrack written into the zip is not a byte-for-byte copy of the one
+    # on disk: each source gets its "hash", so importing doesn't have to read the
+    # audio again, and "zip" is pointed at the name the audio got in this zip,
+    # which differs when two sources share a basename. The file on disk is untouched.
+    embed = settings.get("embed", False)
+    progress = ProgressPlan("export_files", EXPORT_STAGES, set_progress)
+    progress.stage("load soundtrack", "Loading paths...")
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        st = json.load(f)
+
+    sources = []
+    for s in st.keys():
+        if st[s]["source"] and st[s]["source"] not in sources:
+            sources.append(st[s]["source"])
+    sizes = {source_path: source_size(os.path.abspath(source_path)) for source_path in sources}
+    total_bytes = sum(sizes.values())
+    progress.expect("hash sources", units=total_bytes / (1024 * 1024))
+
+    # Embedding converts whatever the SX cache doesn't have yet, one member at a
+    # time, so like an apply its share of the bar follows the audio sx still has to
+    # convert, at recent sx seconds per byte. Until the sources are hashed, none of
+    # them counts as cached.
+    seconds_per_byte = None
+    if embed:
+        try:
+            seconds_per_byte = history.sx_seconds_per_byte()
+        except (OSError, sqlite3.Error):
+            pass
+    def expect_conversion(convert_bytes):
+        progress.expect(
+            "embed converted audio", units=convert_bytes / (1024 * 1024),
+            seconds=convert_bytes * seconds_per_byte if seconds_per_byte else None
+        )
+    expect_conversion(total_bytes if embed else 0)
+
+    workers = max(1, (os.cpu_count() or 1) - 2)
+    os.makedirs("temp", exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="export_", dir="temp")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            progress.stage("hash sources", "Checking for duplicate files...", sources=len(sources))
+            hashes = {}
+            hashed_bytes = 0
+            results = executor.map(profiled(lambda path: None if canceled and canceled() else hash_file(path)), sources)
+            for source_path, source_hash in zip(sources, results):
+                hashes[source_path] = source_hash
+                hashed_bytes += sizes[source_path]
+                progress.advance(hashed_bytes, total_bytes, "Checking for duplicate files...")
+            if canceled and canceled():
+                if set_progress: set_progress(100, "Export canceled.")
+                return
+
+            # identical files are only stored once, under the first name they were seen with
+            members = {}  # hash -> (archive name, source path)
+            taken = {os.path.basename(filename).lower()}
+            for source_path in sources:
+                if hashes[source_path] not in members:
+                    members[hashes[source_path]] = (export_member_name(source_path, taken), source_path)
+
+            for s in st.keys():
+                if st[s]["source"]:
+                    source_hash = hashes[st[s]["source"]]
+                    st[s]["hash"] = source_hash
+                    if "zip" in st[s]:
+                        st[s]["zip"] = os.path.join(os.path.dirname(st[s]["zip"]), members[source_hash][0])
+
+            if embed:
+                convert_sizes = {source_hash: conversion_bytes(source_path, source_hash) for source_hash, (name, source_path) in members.items()}
+                convert_bytes = sum(convert_sizes.values())
+                expect_conversion(convert_bytes)
+            # duplicates are only written once
+            members_bytes = sum(sizes[source_path] for name, source_path in members.values())
+            progress.expect("write zip", units=members_bytes / (1024 * 1024))
+
+            # compress PCM in parallel; everything else is already compressed audio
+            jobs = []
+            for source_hash, (name, source_path) in members.items():
+                if source_path.lower().endswith(DEFLATE_EXTENSIONS):
+                    raw_path = os.path.join(work_dir, source_hash)
+                    jobs.append((name, source_path, raw_path, executor.submit(profiled(deflate_to_file), source_path, raw_path)))
+                else:
+                    jobs.append((name, source_path, None, None))
+
+            # zipfile only writes what it compresses itself, so the members deflated
+            # on the pool go through ZipWriter as they are
+            try:
+                with ZipWriter(export_path) as z:
+                    soundtrack_info = zipfile.ZipInfo(os.path.basename(filename), time.localtime()[:6])
+                    soundtrack_info.external_attr = 0o644 << 16
+                    z.writestr(soundtrack_info, json.dumps(st, indent=2).encode("utf-8"))
+
+                    progress.stage("write zip", "Exporting...")
+                    written_bytes = 0
+                    for name, source_path, raw_path, future in jobs:
+                        if canceled and canceled():
+                            break
+                        progress.advance(written_bytes, members_bytes, f"Exporting \"{name}\"...")
+                        crc, size, compressed = future.result() if future else (0, 0, 0)
+                        zinfo = source_zipinfo(source_path, name)
+                        if future and compressed < size:
+                            zinfo.compress_type = zipfile.ZIP_DEFLATED
+                            zinfo.CRC = crc
+                            zinfo.file_size = size
+                            zinfo.compress_size = compressed
+                            with open(raw_path, "rb") as src:
+                                z.write_raw(zinfo, src)
+                        else:
+                            with open_source(source_path) as src:
+                                z.write_stream(zinfo, src)
+                        if raw_path:
+                            os.remove(raw_path)
+                        written_bytes += sizes[source_path]
+
+                    if embed and not (canceled and canceled()):
+                        progress.stage(
+                            "embed converted audio", "Embedding converted audio...",
+                            songs=len(members), megabytes=round(convert_bytes / (1024 * 1024), 1)
+                        )
+                        converted = 0
+                        converted_bytes = 0
+                        for source_hash, (name, source_path) in members.items():
+                            # each member also counts as one byte, so cached ones still move the bar
+                            progress.advance(
+                                converted_bytes + converted, convert_bytes + len(members),
+                                f"Embedding converted \"{name}\"..."
+                            )
+                            cached = convert_source(source_path, settings, source_hash, canceled=canceled)
+                            if cached is None:
+                                break
+                            for cached_path, ext in zip(cached, (".snr", ".sns")):
+                                with open(cached_path, "rb") as src:
+                                    z.write_stream(zipfile.ZipInfo.from_file(cached_path, sx_payload_name(source_hash, ext)), src)
+                            converted += 1
+                            converted_bytes += convert_sizes[source_hash]
+            except BaseException:
+                # a half-written zip is no use to anyone
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+                raise
+
+            if canceled and canceled():
+                # deflates that haven't started yet are dropped rather than waited on
+                executor.shutdown(cancel_futures=True)
+                os.remove(export_path)
+                if set_progress: set_progress(100, "Export canceled.")
+                return
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    progress.finish("Done!")
 
 # settings = {
 #     "game": r"C:\Program Files (x86)\Steam\steamapps\common\Burnout(TM) Paradise The Ultimate Box",
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+
+from Tracing import TRACES_DIR
+
+HISTORY_FILE = os.path.join(TRACES_DIR, "history.sqlite")
+MAX_SUBPROCESSES = 5000  # rows kept, oldest deleted first
+MAX_STAGES = 5000
+COST_SAMPLES = 50        # recent sx conversions the cost model averages over
+STAGE_SAMPLES = 10       # recent runs each stage estimate averages over
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subprocesses (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,       -- unix time
+    action TEXT NOT NULL,        -- "sx" or the YAP step
+    command TEXT NOT NULL,
+    source TEXT,                 -- file being converted, for sx
+    source_bytes INTEGER,
+    background INTEGER NOT NULL DEFAULT 0,
+    wall_s REAL NOT NULL,
+    user_s REAL,
+    sys_s REAL,
+    max_rss INTEGER,
+    returncode INTEGER,          -- NULL if canceled
+    stdout_tail TEXT,
+    stderr_tail TEXT
+);
+CREATE INDEX IF NOT EXISTS subprocesses_action ON subprocesses (action, started);
+CREATE TABLE IF NOT EXISTS stages (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,       -- unix time the run finished
+    kind TEXT NOT NULL,          -- the function, e.g. "write_pointers"
+    stage TEXT NOT NULL,
+    wall_s REAL NOT NULL,
+    units REAL NOT NULL          -- songs, MB or whatever the stage's work is counted in
+);
+CREATE INDEX IF NOT EXISTS stages_kind ON stages (kind, stage, started);
+"""
+
+class RunHistory:
+    """Every sx and YAP invocation and the stage timings of finished runs, kept in an
+    SQLite file next to the traces.
+
+    Rows can be queried with any SQLite client. The conversion scheduler reads its
+    cost model from here and progress estimates read past stage timings, so both
+    get better the more BPSS is used.
+    """
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self):
+        # opened on first use and shared by every thread, behind the lock
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def record_subprocess(self, record):
+        columns = ", ".join(record)
+        marks = ", ".join("?" * len(record))
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                cursor = connection.execute(f"INSERT INTO subprocesses ({columns}) VALUES ({marks})", list(record.values()))
+                connection.execute("DELETE FROM subprocesses WHERE id <= ?", (cursor.lastrowid - MAX_SUBPROCESSES,))
+
+    def subprocesses(self, since=0, until=None, action=None):
+        # rows started in [since, until], oldest first
+        query = "SELECT * FROM subprocesses WHERE started >= ? AND started <= ?"
+        params = [since, time.time() if until is None else until]
+        if action:
+            query += " AND action = ?"
+            params.append(action)
+        with self.lock:
+            return [dict(row) for row in self.connect().execute(query + " ORDER BY started", params)]
+
+    def sx_seconds_per_byte(self):
+        # wall time sx has recently taken per source byte, or None before any conversion
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT SUM(wall_s), SUM(source_bytes) FROM ("
+                " SELECT wall_s, source_bytes FROM subprocesses"
+                " WHERE action = 'sx' AND returncode = 0 AND source_bytes > 0"
+                " ORDER BY started DESC LIMIT ?)",
+                (COST_SAMPLES,)
+            ).fetchone()
+        if not row[1]:
+            return None
+        return row[0] / row[1]
+
+    def record_stages(self, kind, timings):
+        # timings: stage -> (seconds, units)
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.executemany(
+                    "INSERT INTO stages (started, kind, stage, wall_s, units) VALUES (?, ?, ?, ?, ?)",
+                    [(now, kind, name, seconds, units) for name, (seconds, units) in timings.items()]
+                )
+                last = connection.execute("SELECT MAX(id) FROM stages").fetchone()[0] or 0
+                connection.execute("DELETE FROM stages WHERE id <= ?", (last - MAX_STAGES,))
+
+    def stage_estimates(self, kind):
+        # stage -> (seconds per unit, usual units) over the recent runs of kind
+        with self.lock:
+            rows = self.connect().execute(
+                "SELECT stage, SUM(wall_s) / SUM(units), AVG(units) FROM ("
+                " SELECT stage, wall_s, units, ROW_NUMBER() OVER (PARTITION BY stage ORDER BY started DESC) AS n"
+                " FROM stages WHERE kind = ? AND units > 0)"
+                " WHERE n <= ? GROUP BY stage",
+                (kind, STAGE_SAMPLES)
+            ).fetchall()
+        return {stage: (rate, units) for stage, rate, units in rows}
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+history = RunHistory()
@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+from Helpers import resource_path
+
+# How the strings after a song's name are laid out in the vault, by type and lock.
+# ("read", field) consumes the next string, ("alias", field, other) reuses a string
+# already read, and ("optional", field) consumes the next string only if it still
+# holds the default, otherwise the field has no string of its own.
+FULL = (("read", "stream"), ("read", "artist"), ("read", "album"))
+LOCK_LAYOUTS = {
+    0: FULL,                                                                        # no lock
+    1: (("read", "stream"), ("read", "artist"), ("optional", "album")),             # no album (FRICTION)
+    3: (("read", "stream"), ("read", "artist"), ("alias", "album", "artist")),      # artist/album sync
+    6: (("read", "stream"), ("alias", "artist", "stream"), ("read", "album")),      # stream/artist sync
+    7: (("read", "stream"), ("alias", "artist", "stream"), ("alias", "album", "stream")),  # stream/artist/album sync
+    9: (("read", "stream"), ("read", "artist"), ("alias", "album", "title")),       # song/album sync
+}
+# burnout and classical soundtracks may share their artist and album with another song
+SHARED_LAYOUT = (("read", "stream"), ("optional", "artist"), ("optional", "album"))
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def layout_for(entry):
+    if entry["type"] == 0:
+        return LOCK_LAYOUTS[entry["lock"]]
+    return SHARED_LAYOUT
+
+class SongCatalog:
+    """The songs in defaults.json, loaded once and shared by the GUI and processing.
+
+    Rows follow the file order. Keys, rows and stream ids map to each other through
+    dictionaries, and each song's vault layout is worked out up front.
+    """
+    def __init__(self, songs):
+        self.songs = songs                                   # key -> defaults.json entry
+        self.keys = list(songs)                              # row -> key
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.ids = {entry["id"].lower(): key for key, entry in songs.items() if "id" in entry}
+        self.layouts = {key: layout_for(entry) for key, entry in songs.items()}
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or resource_path("defaults.json")
+        with _catalogs_lock:
+            catalog = _catalogs.get(path)
+            if catalog is None:
+                songs = {}
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        songs = json.load(f)
+                catalog = _catalogs[path] = cls(songs)
+            return catalog
+
+    def __contains__(self, key):
+        return key in self.songs
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key(self, row):
+        return self.keys[row]
+
+    def row(self, key):
+        return self.rows[key]
+
+    def defaults(self, key):
+        return self.songs[key]["defaults"]
+
+    def stream_id(self, key):
+        return self.songs[key]["id"]
+
+    def by_stream_id(self, stream_id):
+        return self.ids.get(stream_id.lower())
+
+    def layout(self, key):
+        return self.layouts[key]
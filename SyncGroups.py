@@ -0,0 +1,104 @@
+FIELD_COLUMNS = {"title": 1, "album": 2, "artist": 3, "stream": 4}
+STREAM_COLUMN = 4
+# order set_table_row writes a row in, so the field a shared string is named after is written last
+SET_ORDER = [2, 1, 3]
+
+class SyncGroups:
+    """Index of table cells that share a string in the game files.
+
+    Groups are found by joining every field that points at the same vault string,
+    so no per-song lock codes are needed. Groups are numbered in table order and
+    the number doubles as the group's color id so colors stay put when the table
+    is refilled.
+    """
+    def __init__(self):
+        self.groups = []             # group id -> list of (row, column) tuples
+        self.cells = {}              # (row, column) -> group id
+        self.colors = {}             # group id -> color id, for groups the user can edit
+        self.locked = set()          # cells that share their string with the stream name
+        self.shadowed = set()        # cells overwritten by a later field of their own row
+        self.disambiguatable = set() # (row, column) tuples that may be given their own pointer
+
+    @classmethod
+    def from_pointers(cls, ptrs):
+        sync = cls()
+        parent = {}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        def union(a, b):
+            a, b = find(a), find(b)
+            if a != b:
+                # the earliest cell in the table stays the root
+                parent[max(a, b)] = min(a, b)
+
+        # fields without pointers of their own borrow the list of the first row in table
+        # order with the same string, as PointerTable.targets_for does when writing
+        borrowed = {}
+        for entry in ptrs.values():
+            for field in FIELD_COLUMNS:
+                targets = entry.get("ptrs", {}).get(field, [])
+                value = entry.get("strings", {}).get(field)
+                if targets and value is not None:
+                    borrowed.setdefault((field, value), targets)
+
+        owners = {}  # pointer location -> first cell that points through it
+        for row, entry in enumerate(ptrs.values()):
+            for field, col in FIELD_COLUMNS.items():
+                cell = (row, col)
+                parent[cell] = cell
+                targets = entry.get("ptrs", {}).get(field, [])
+                if not targets:
+                    targets = borrowed.get((field, entry.get("strings", {}).get(field)), [])
+                for target in targets:
+                    union(owners.setdefault(target, cell), cell)
+
+        members = {}
+        for cell in sorted(parent):
+            members.setdefault(find(cell), []).append(cell)
+
+        for group in members.values():
+            if len(group) < 2:
+                continue
+            group_id = len(sync.groups)
+            sync.groups.append(group)
+            locked = any(col == STREAM_COLUMN for (_, col) in group)
+            if not locked:
+                sync.colors[group_id] = len(sync.colors)
+            for (row, col) in group:
+                sync.cells[(row, col)] = group_id
+                if col == STREAM_COLUMN:
+                    continue
+                sync.disambiguatable.add((row, col))
+                if locked:
+                    sync.locked.add((row, col))
+                    sync.shadowed.add((row, col))
+                elif any(r == row and c != STREAM_COLUMN and SET_ORDER.index(c) > SET_ORDER.index(col) for (r, c) in group):
+                    sync.shadowed.add((row, col))
+        return sync
+
+    def group_id(self, cell):
+        return self.cells.get(cell)
+
+    def group(self, cell):
+        group = self.cells.get(cell)
+        return self.groups[group] if group is not None else []
+
+    def color(self, cell):
+        return self.colors.get(self.cells.get(cell))
+
+    def is_locked(self, cell):
+        return cell in self.locked
+
+    def is_shadowed(self, cell):
+        return cell in self.shadowed
+
+    def is_disambiguatable(self, cell):
+        return cell in self.disambiguatable
+
+    def __len__(self):
+        return len(self.groups)
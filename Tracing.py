@@ -0,0 +1,292 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACES_DIR = "traces"
+MAX_EVENTS = 20000   # spans kept in memory, oldest dropped first
+MAX_TRACES = 20      # trace files kept on disk, oldest deleted first
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount"
+        )]
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    _kernel32 = ctypes.WinDLL("kernel32")
+    _kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    _kernel32.GetProcessIoCounters.argtypes = [wintypes.HANDLE, ctypes.POINTER(IO_COUNTERS)]
+    _kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    _kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+
+    def io_counters():
+        counters = IO_COUNTERS()
+        if not _kernel32.GetProcessIoCounters(_kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+            return 0, 0
+        return counters.ReadTransferCount, counters.WriteTransferCount
+
+    def peak_rss():
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if not _kernel32.K32GetProcessMemoryInfo(_kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return 0
+        return counters.PeakWorkingSetSize
+
+    def seconds(filetime):
+        # FILETIME durations count 100 ns ticks
+        return ((filetime.dwHighDateTime << 32) | filetime.dwLowDateTime) / 1e7
+
+    def wait_process(process, timeout=None):
+        # Popen.wait that also returns the child's (user s, system s, peak RSS)
+        returncode = process.wait(timeout)
+        handle = wintypes.HANDLE(int(process._handle))
+        created, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not _kernel32.GetProcessTimes(handle, created, exited, kernel, user):
+            return returncode, (0.0, 0.0, 0)
+        memory = PROCESS_MEMORY_COUNTERS()
+        memory.cb = ctypes.sizeof(memory)
+        peak = memory.PeakWorkingSetSize if _kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(memory), memory.cb) else 0
+        return returncode, (seconds(user), seconds(kernel), peak)
+else:
+    import resource
+
+    def io_counters():
+        # storage reads and writes are only exposed through procfs
+        read_bytes = write_bytes = 0
+        try:
+            with open("/proc/self/io", "r") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key == "rchar":
+                        read_bytes = int(value)
+                    elif key == "wchar":
+                        write_bytes = int(value)
+        except OSError:
+            pass
+        return read_bytes, write_bytes
+
+    def peak_rss():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def wait_process(process, timeout=None):
+        # Popen.wait that also returns the child's (user s, system s, peak RSS). The
+        # child is reaped with wait4 to get its own usage, not that of every child.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            pid, status, usage = os.wait4(process.pid, 0 if deadline is None else os.WNOHANG)
+            if pid:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            delay = min(delay * 2, remaining, 0.05)
+            time.sleep(delay)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        peak = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        return process.returncode, (usage.ru_utime, usage.ru_stime, peak)
+
+class Tracer:
+    """Records timed spans from any thread and writes them out as Chrome trace JSON.
+
+    Each span keeps its wall time, the CPU time of its thread, the bytes the process
+    read and wrote while it was open and the process's peak RSS when it closed. I/O
+    counters are process-wide, so spans that overlap other work include that work's
+    I/O too. Traces open in chrome://tracing or https://ui.perfetto.dev.
+
+    Long functions are wrapped with traced() and mark their steps with stage(), which
+    ends the previous step of the same call, so a step is a single line.
+    """
+    def __init__(self):
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.threads = {}  # thread id -> thread name
+        self.lock = threading.Lock()
+        self.local = threading.local()  # open stages of the traced calls on each thread
+        self.origin = time.perf_counter()
+
+    def now(self):
+        # microseconds since the tracer was made
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def begin(self, name, category, args):
+        return (name, category, args, self.now(), time.thread_time(), io_counters())
+
+    def end(self, opened):
+        name, category, args, start, cpu, (read_bytes, write_bytes) = opened
+        thread = threading.current_thread()
+        end_read, end_write = io_counters()
+        args.update({
+            "cpu_ms": round((time.thread_time() - cpu) * 1000, 3),
+            "read_bytes": end_read - read_bytes,
+            "write_bytes": end_write - write_bytes,
+            "peak_rss": peak_rss(),
+        })
+        event = {
+            "name": name, "cat": category, "ph": "X",
+            "ts": round(start, 1), "dur": round(self.now() - start, 1),
+            "pid": os.getpid(), "tid": thread.ident, "args": args,
+        }
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        # args can be added to from inside the with block
+        opened = self.begin(name, category, args)
+        try:
+            yield args
+        finally:
+            self.end(opened)
+
+    def traced(self, name):
+        # decorator: a span around the whole call, which also closes its last stage
+        def wrap(func):
+            @functools.wraps(func)
+            def call(*args, **kwargs):
+                stages = self.stages()
+                stages.append(None)
+                try:
+                    with self.span(name, "run"):
+                        try:
+                            return func(*args, **kwargs)
+                        finally:
+                            if stages[-1]:
+                                self.end(stages[-1])
+                finally:
+                    stages.pop()
+            return call
+        return wrap
+
+    def stages(self):
+        if not hasattr(self.local, "stages"):
+            self.local.stages = []
+        return self.local.stages
+
+    def stage(self, name, category="stage", **args):
+        # ends the current stage of the innermost traced call on this thread and starts the next
+        stages = self.stages()
+        if not stages:
+            return
+        if stages[-1]:
+            self.end(stages[-1])
+        stages[-1] = self.begin(name, category, args)
+
+    def collect(self, since=0):
+        # spans that ended after since, in start order
+        with self.lock:
+            events = [event for event in self.events if event["ts"] + event["dur"] >= since]
+            threads = dict(self.threads)
+        events.sort(key=lambda event: event["ts"])
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return names + events
+
+    def export(self, path, since=0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.collect(since), "displayTimeUnit": "ms"}, f)
+        return path
+
+    def run_base(self, kind):
+        # traces/<kind>-<time>, shared by a run's trace and profile
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        return os.path.join(TRACES_DIR, f"{kind}-{stamp}")
+
+    def export_run(self, base, since=0):
+        # writes <base>.json and drops the oldest runs past MAX_TRACES
+        path = self.export(base + ".json", since)
+        traces = sorted(
+            (os.path.join(TRACES_DIR, name) for name in os.listdir(TRACES_DIR) if name.endswith(".json")),
+            key=os.path.getmtime
+        )
+        for old in traces[:-MAX_TRACES]:
+            for old_path in (old, os.path.splitext(old)[0] + ".prof"):
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        return path
+
+tracer = Tracer()
+span = tracer.span
+stage = tracer.stage
+traced = tracer.traced
+
+class ProfileSession:
+    """cProfile for a job, including the work it hands to thread pools.
+
+    Before Python 3.12 a profiler only sees the thread that enabled it, so sx waits,
+    hashing and deflating on a ThreadPoolExecutor would be missing from the job's
+    profile. Functions passed through profiled() on the job's thread get a profiler
+    of their own on the pool thread, and save() merges them into the job's stats.
+    From 3.12 on cProfile sees every thread, so profiled() leaves functions alone.
+    """
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.pool_profilers = []
+        self.lock = threading.Lock()
+
+    def enable(self):
+        tracer.local.profile = self
+        self.profiler.enable()
+
+    def disable(self):
+        self.profiler.disable()
+        tracer.local.profile = None
+
+    def wrap(self, func):
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                with self.lock:
+                    self.pool_profilers.append(profiler)
+        return call
+
+    def save(self, path):
+        stats = pstats.Stats(self.profiler)
+        with self.lock:
+            for profiler in self.pool_profilers:
+                stats.add(profiler)
+        stats.dump_stats(path)
+
+def profiled(func):
+    # for work a job hands to a pool: profiled along with the job, if the job is
+    session = getattr(tracer.local, "profile", None)
+    if session is None or sys.version_info >= (3, 12):
+        return func
+    return session.wrap(func)
@@ -1,31 +1,194 @@
-from PyQt5.QtCore import QObject, QThread, pyqtSignal
-from Processing import load_pointers, write_pointers, reset_files, export_files
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from Processing import load_pointers, write_pointers, reset_files, export_files, import_zip, convert_source, probe_source
+from Helpers import source_exists, source_stat
+from Tracing import tracer, span, ProfileSession
+from Logs import get_logger
+from concurrent.futures import Future, ThreadPoolExecutor
+import itertools
+import os
+import threading
 import time
 
-class ResetWorker(QObject):
+log = get_logger("workers")
+
+# progress reaches the GUI at most this often, in milliseconds
+PROGRESS_INTERVAL = 100
+# lower runs first; anything the user is waiting on goes ahead of background work
+FOREGROUND = 0
+BACKGROUND = 1
+# load, write and reset all extract into temp/globaldata and touch the game files
+GAME_FILES = "game"
+# held by the job running under cProfile
+_profiling = threading.Lock()
+# seconds closing BPSS waits for canceled jobs before leaving them to die with it
+SHUTDOWN_TIMEOUT = 5
+
+class ProgressAggregator(QObject):
+    """Collects progress reports from any thread and hands them to the GUI at a bounded rate.
+
+    Each task reports 0-100 through the callable task() returns, and the overall value
+    weighs tasks by their share of the work. Reporters may also pass the seconds they
+    expect to have left, and the latest estimate is handed on as eta_changed, with -1
+    for none. A timer on the GUI thread emits at most every PROGRESS_INTERVAL ms, and
+    only if something changed, so reporters never wait on the event loop.
+    """
+    progress_changed = pyqtSignal(int, str)
+    eta_changed = pyqtSignal(float)
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        super().__init__()
+        self.tasks = {}  # name -> [weight, value]
+        self.status = ""
+        self.eta = -1
+        self.eta_dirty = False
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.deliver)
+
+    def task(self, name="", weight=1):
+        with self.lock:
+            self.tasks[name] = [weight, 0]
+
+        def report(val, status, eta=None):
+            self.update(name, val, status, eta)
+        return report
+
+    def update(self, name, val, status, eta=None):
+        with self.lock:
+            if val <= 100:
+                self.tasks[name][1] = val
+            if status:
+                self.status = status
+            eta = -1 if eta is None else eta
+            if eta != self.eta:
+                self.eta = eta
+                self.eta_dirty = True
+            self.dirty = True
+
+    def value(self):
+        # caller holds the lock
+        total = sum(weight for weight, _ in self.tasks.values())
+        if not total:
+            return 0
+        return int(sum(weight * value for weight, value in self.tasks.values()) / total)
+
+    def deliver(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            val, status = self.value(), self.status
+            eta, eta_dirty = self.eta, self.eta_dirty
+            self.eta_dirty = False
+        self.progress_changed.emit(val, status)
+        if eta_dirty:
+            self.eta_changed.emit(eta)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        # hand over whatever came in since the last tick
+        self.timer.stop()
+        self.deliver()
+
+class Job(QObject):
+    """One unit of work for the JobQueue.
+
+    Subclasses set kind, label, priority and resource and override work(). Progress,
+    the return value and errors arrive as signals, so slots run on the GUI thread.
+    Jobs are created on the GUI thread, which owns their progress timer.
+    """
     progress_changed = pyqtSignal(int, str)
+    eta_changed = pyqtSignal(float)
+    result = pyqtSignal(object)
     finished = pyqtSignal()
     error = pyqtSignal(Exception)
 
-    def __init__(self, settings):
+    kind = "job"
+    label = "working"  # what the user is told BPSS is still doing
+    priority = FOREGROUND
+    resource = None  # jobs naming the same resource never run at the same time
+    profiled = False  # whether this kind of job runs under the profiler when asked to
+
+    def __init__(self):
         super().__init__()
-        self.settings = settings
+        self.canceled = threading.Event()
+        self.done = threading.Event()
+        self.profile = False  # set before submitting to save a cProfile next to the trace
+        self.progress = ProgressAggregator()
+        self.progress.progress_changed.connect(self.progress_changed)
+        self.progress.eta_changed.connect(self.eta_changed)
+        self.finished.connect(self.progress.stop)
+        self.progress.start()
+
+    def cancel(self):
+        self.canceled.set()
+
+    def is_canceled(self):
+        return self.canceled.is_set()
+
+    def is_running(self):
+        # queued jobs count as running, so a progress dialog stays up until they are done
+        return not self.done.is_set()
 
     def run(self):
-        def update_progress(val, string):
-            self.progress_changed.emit(val, string)
-        
-        try:
-            reset_files(self.settings, update_progress)
-        except Exception as e:
-            self.error.emit(e)
-        time.sleep(.5)
+        if not self.is_canceled():
+            start = tracer.now()
+            base = tracer.run_base(self.kind)
+            profiler = None
+            # only one profiler can be active at a time, so overlapping requests run without one
+            if self.profile and _profiling.acquire(blocking=False):
+                profiler = ProfileSession()
+            try:
+                with span(self.kind, "job"):
+                    if profiler:
+                        profiler.enable()
+                    try:
+                        value = self.work(self.progress.task(), self.is_canceled)
+                    finally:
+                        if profiler:
+                            profiler.disable()
+                            _profiling.release()
+                    self.result.emit(value)
+            except Exception as e:
+                self.error.emit(e)
+            # every run leaves a trace that can be attached to a bug report
+            try:
+                tracer.export_run(base, since=start)
+                if profiler:
+                    profiler.save(base + ".prof")
+            except OSError as e:
+                log.warning("Could not write trace for %s: %s", self.kind, e)
+        self.done.set()
         self.finished.emit()
 
-class WriteWorker(QObject):
-    progress_changed = pyqtSignal(int, str)
-    finished = pyqtSignal()
-    error = pyqtSignal(Exception)
+    def work(self, set_progress, canceled):
+        # does nothing; subclasses override this and return the job's result
+        return None
+
+class LoadJob(Job):
+    kind = "load"
+    label = "finding pointers"
+    profiled = True
+    priority = BACKGROUND
+    resource = GAME_FILES
+
+    def __init__(self, settings, filename):
+        super().__init__()
+        self.settings = settings
+        self.filename = filename
+
+    def work(self, set_progress, canceled):
+        load_pointers(self.settings, self.filename, set_progress, canceled)
+
+class WriteJob(Job):
+    kind = "write"
+    label = "applying a soundtrack"
+    profiled = True
+    resource = GAME_FILES
 
     def __init__(self, settings, soundtrack, pointers):
         super().__init__()
@@ -33,57 +196,218 @@ class WriteWorker(QObject):
         self.soundtrack = soundtrack
         self.pointers = pointers
 
-    def run(self):
-        def update_progress(val, string):
-            self.progress_changed.emit(val, string)
-
-        try:
-            write_pointers(self.settings, self.soundtrack, self.pointers, update_progress)
-        except Exception as e:
-            self.error.emit(e)
-        time.sleep(.5)
-        self.finished.emit()
+    def work(self, set_progress, canceled):
+        write_pointers(self.settings, self.soundtrack, self.pointers, set_progress, canceled)
 
-class LoadWorker(QObject):
-    progress_changed = pyqtSignal(int, str)
-    finished = pyqtSignal()
-    error = pyqtSignal(Exception)
+class ResetJob(Job):
+    kind = "reset"
+    label = "restoring the default soundtrack"
+    resource = GAME_FILES
 
-    def __init__(self, settings, filename):
+    def __init__(self, settings):
         super().__init__()
         self.settings = settings
-        self.filename = filename
 
-    def run(self):
-        def update_progress(val, string):
-            self.progress_changed.emit(val, string)
-
-        try:
-            load_pointers(self.settings, self.filename, update_progress)
-        except Exception as e:
-            self.error.emit(e)
-        time.sleep(.5)
-        self.finished.emit()
+    def work(self, set_progress, canceled):
+        reset_files(self.settings, set_progress, canceled)
 
-class ExportWorker(QObject):
-    progress_changed = pyqtSignal(int, str)
-    finished = pyqtSignal()
-    error = pyqtSignal(Exception)
+class ExportJob(Job):
+    kind = "export"
+    label = "exporting a soundtrack"
+    profiled = True
 
     def __init__(self, settings, filename, export_path):
         super().__init__()
         self.settings = settings
         self.filename = filename
         self.export_path = export_path
-    
+
+    def work(self, set_progress, canceled):
+        export_files(self.settings, self.filename, self.export_path, set_progress, canceled)
+
+class ImportJob(Job):
+    kind = "import"
+    label = "opening a zip"
+
+    def __init__(self, zip_path):
+        super().__init__()
+        self.zip_path = zip_path
+
+    def work(self, set_progress, canceled):
+        return import_zip(self.zip_path, set_progress, canceled)
+
+class JobQueue:
+    # A few long-lived threads that run Jobs in priority order, oldest first within
+    # a priority. Jobs that share a resource wait for each other; anything else may
+    # run alongside, so an export does not have to wait for a pointer scan.
+    def __init__(self, workers=3):
+        self.pending = []  # (priority, order, job)
+        self.running = set()
+        self.busy = set()  # resources held by running jobs
+        self.order = itertools.count()
+        self.stopped = False
+        self.condition = threading.Condition()
+        self.threads = [threading.Thread(target=self.work, name=f"job-{i}", daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job):
+        with self.condition:
+            self.pending.append((job.priority, next(self.order), job))
+            self.condition.notify_all()
+        return job
+
+    def next_job(self):
+        # caller holds the condition
+        ready = [entry for entry in self.pending if entry[2].resource is None or entry[2].resource not in self.busy]
+        if not ready:
+            return None
+        entry = min(ready, key=lambda entry: entry[:2])
+        self.pending.remove(entry)
+        return entry[2]
+
+    def work(self):
+        while True:
+            with self.condition:
+                job = None
+                while not self.stopped and (job := self.next_job()) is None:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                self.running.add(job)
+                if job.resource:
+                    self.busy.add(job.resource)
+
+            job.run()
+
+            with self.condition:
+                self.running.discard(job)
+                self.busy.discard(job.resource)
+                self.condition.notify_all()
+
+    def unfinished(self, priority=FOREGROUND):
+        # running and queued jobs at priority or more urgent
+        with self.condition:
+            jobs = list(self.running) + [job for _, _, job in self.pending]
+        return [job for job in jobs if job.priority <= priority]
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        # Cancels everything and waits up to timeout seconds for running jobs to
+        # notice. The threads are daemons, so a job still going after that ends
+        # with the process.
+        with self.condition:
+            self.stopped = True
+            dropped = [job for _, _, job in self.pending]
+            for job in dropped:
+                job.cancel()
+                job.done.set()
+            self.pending.clear()
+            for job in self.running:
+                job.cancel()
+            self.condition.notify_all()
+        if dropped:
+            log.warning("Dropped %d queued jobs at shutdown: %s", len(dropped), ", ".join(job.kind for job in dropped))
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        with self.condition:
+            stuck = list(self.running)
+        if stuck:
+            log.warning("Gave up waiting on %s after %ss at shutdown", ", ".join(job.kind for job in stuck), timeout)
+
+class PrefetchWorker(QObject):
+    converted = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, settings):
+        super().__init__()
+        self.settings = settings
+        self.pending = {}  # key -> (source path, known hash), oldest first
+        self.current = None  # (key, source path) being converted
+        self.current_canceled = False
+        self.stopped = False
+        self.condition = threading.Condition()
+
+    def enqueue(self, key, source, source_hash=None):
+        # Queue source for conversion under key, replacing whatever key asked for before
+        with self.condition:
+            self.pending.pop(key, None)
+            if source:
+                self.pending[key] = (source, source_hash)
+            if self.current and self.current[0] == key and self.current[1] != source:
+                self.current_canceled = True
+            self.condition.notify()
+
+    def cancel(self, key):
+        self.enqueue(key, None)
+
+    def clear(self):
+        with self.condition:
+            self.pending.clear()
+            if self.current:
+                self.current_canceled = True
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.current_canceled = True
+            self.condition.notify()
+
+    def is_canceled(self):
+        with self.condition:
+            return self.stopped or self.current_canceled
+
     def run(self):
-        def update_progress(val, string):
-            self.progress_changed.emit(val, string)
-
-        try:
-            # export logic
-            export_files(self.settings, self.filename, self.export_path, update_progress)
-        except Exception as e:
-            self.error.emit(e)
-        time.sleep(.5)
-        self.finished.emit()
\ No newline at end of file
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    break
+                key = next(iter(self.pending))
+                source, source_hash = self.pending.pop(key)
+                self.current = (key, source)
+                self.current_canceled = False
+
+            try:
+                if "audio" in self.settings and source_exists(source):
+                    if convert_source(source, self.settings, source_hash, background=True, canceled=self.is_canceled):
+                        self.converted.emit(source)
+            except Exception as e:
+                # Apply converts again and reports the error properly
+                log.warning("Background conversion of %s failed: %s", source, e)
+
+            with self.condition:
+                self.current = None
+        self.finished.emit()
+
+class SourceValidator:
+    # Probes sources on a pool as soon as they are assigned, so Apply and Export
+    # only have to read the verdicts. Verdicts are kept until the file changes.
+    def __init__(self):
+        workers = max(1, min(4, (os.cpu_count() or 1) - 2))
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+        self.probes = {}  # source path -> ((size, mtime), future verdict)
+        self.lock = threading.Lock()
+
+    def probe(self, source):
+        source = os.path.normpath(source.strip()) if source and source.strip() else ""
+        stat = source_stat(source) if source else None
+        if stat is None:
+            # missing files are quick to report and not worth remembering
+            future = Future()
+            future.set_result(probe_source(source) if source else None)
+            return future
+        with self.lock:
+            cached = self.probes.get(source)
+            if cached and cached[0] == stat:
+                return cached[1]
+            future = self.pool.submit(probe_source, source)
+            self.probes[source] = (stat, future)
+            return future
+
+    def verdict(self, source):
+        return self.probe(source).result()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
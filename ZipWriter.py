@@ -0,0 +1,151 @@
+import shutil
+import struct
+import zlib
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_RECORD = struct.Struct("<IHHHHIIH")
+ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+LIMIT = 0xFFFFFFFF
+COUNT_LIMIT = 0xFFFF
+UTF8_FLAG = 0x800
+VERSION = 20
+ZIP64_VERSION = 45
+STORED = 0
+DEFLATED = 8
+CRC_OFFSET = 14  # where the CRC sits in a local header
+
+def dos_time(date_time):
+    year, month, day, hour, minute, second = date_time[:6]
+    return (hour << 11) | (minute << 5) | (second // 2), ((max(year, 1980) - 1980) << 9) | (month << 5) | day
+
+class ZipWriter:
+    """Writes a zip archive one member at a time, straight from the PKWARE format.
+
+    zipfile can only write members it compresses itself, on the thread doing the
+    writing. This takes members deflated anywhere else as they are, so export can
+    deflate on a pool and still write one archive. Members are described with
+    zipfile.ZipInfo, and the result reads back with zipfile like any other zip.
+    Archives over 4GB or 65535 members get zip64 records.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.members = []
+        self.names = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.file.close()
+        else:
+            self.close()
+
+    def write_raw(self, zinfo, src):
+        """Copies member data that is already compressed as zinfo says.
+
+        zinfo needs its compress_type, CRC, file_size and compress_size filled in.
+        """
+        self.write_header(zinfo)
+        shutil.copyfileobj(src, self.file, 1024 * 1024)
+        if self.file.tell() - self.data_start != zinfo.compress_size:
+            raise ValueError(f"\"{zinfo.filename}\" is not {zinfo.compress_size} bytes long")
+
+    def write_stream(self, zinfo, src):
+        """Stores src uncompressed; zinfo.file_size has to be its length."""
+        zinfo.compress_type = STORED
+        zinfo.compress_size = zinfo.file_size
+        zinfo.CRC = 0
+        self.write_header(zinfo)
+        crc = 0
+        while True:
+            chunk = src.read(1024 * 1024)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            self.file.write(chunk)
+        if self.file.tell() - self.data_start != zinfo.file_size:
+            raise ValueError(f"\"{zinfo.filename}\" is not {zinfo.file_size} bytes long")
+        # the CRC is only known now, so it goes back into the header
+        zinfo.CRC = crc
+        end = self.file.tell()
+        self.file.seek(zinfo.header_offset + CRC_OFFSET)
+        self.file.write(struct.pack("<I", crc))
+        self.file.seek(end)
+
+    def writestr(self, zinfo, data):
+        """Deflates a small in-memory member."""
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        zinfo.compress_type = DEFLATED
+        zinfo.CRC = zlib.crc32(data)
+        zinfo.file_size = len(data)
+        zinfo.compress_size = len(compressed)
+        self.write_header(zinfo)
+        self.file.write(compressed)
+
+    def write_header(self, zinfo):
+        if zinfo.filename in self.names:
+            raise ValueError(f"\"{zinfo.filename}\" is already in the archive")
+        self.names.add(zinfo.filename)
+        zinfo.header_offset = self.file.tell()
+        name, flags = self.encode_name(zinfo.filename)
+        zip64 = zinfo.file_size >= LIMIT or zinfo.compress_size >= LIMIT
+        extra = struct.pack("<HHQQ", 1, 16, zinfo.file_size, zinfo.compress_size) if zip64 else b""
+        dostime, dosdate = dos_time(zinfo.date_time)
+        self.file.write(LOCAL_HEADER.pack(
+            0x04034b50, ZIP64_VERSION if zip64 else VERSION, flags, zinfo.compress_type, dostime, dosdate,
+            zinfo.CRC, LIMIT if zip64 else zinfo.compress_size, LIMIT if zip64 else zinfo.file_size,
+            len(name), len(extra),
+        ))
+        self.file.write(name)
+        self.file.write(extra)
+        self.data_start = self.file.tell()
+        self.members.append(zinfo)
+
+    @staticmethod
+    def encode_name(filename):
+        try:
+            return filename.encode("ascii"), 0
+        except UnicodeEncodeError:
+            return filename.encode("utf-8"), UTF8_FLAG
+
+    def close(self):
+        if self.file.closed:
+            return
+        start = self.file.tell()
+        for zinfo in self.members:
+            self.write_central_header(zinfo)
+        end = self.file.tell()
+        count = len(self.members)
+        if count >= COUNT_LIMIT or start >= LIMIT or end - start >= LIMIT:
+            self.file.write(ZIP64_END_RECORD.pack(
+                0x06064b50, ZIP64_END_RECORD.size - 12, ZIP64_VERSION, ZIP64_VERSION, 0, 0,
+                count, count, end - start, start,
+            ))
+            self.file.write(ZIP64_LOCATOR.pack(0x07064b50, 0, end, 1))
+        self.file.write(END_RECORD.pack(
+            0x06054b50, 0, 0, min(count, COUNT_LIMIT), min(count, COUNT_LIMIT),
+            min(end - start, LIMIT), min(start, LIMIT), 0,
+        ))
+        self.file.close()
+
+    def write_central_header(self, zinfo):
+        name, flags = self.encode_name(zinfo.filename)
+        # zip64 fields go in this order, and only for the values that don't fit
+        fields = [value for value in (zinfo.file_size, zinfo.compress_size, zinfo.header_offset) if value >= LIMIT]
+        extra = struct.pack(f"<HH{len(fields)}Q", 1, len(fields) * 8, *fields) if fields else b""
+        version = ZIP64_VERSION if fields else VERSION
+        dostime, dosdate = dos_time(zinfo.date_time)
+        self.file.write(CENTRAL_HEADER.pack(
+            0x02014b50, (zinfo.create_system << 8) | version, version, flags, zinfo.compress_type,
+            dostime, dosdate, zinfo.CRC,
+            min(zinfo.compress_size, LIMIT), min(zinfo.file_size, LIMIT),
+            len(name), len(extra), 0, 0, 0, zinfo.external_attr, min(zinfo.header_offset, LIMIT),
+        ))
+        self.file.write(name)
+        self.file.write(extra)
@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import stat
+import sys
+import zipfile
+
+from common import ROOT, work_dir, summarize, timed, latest_results, save_results, report
+from vault import build_vault
+
+import Processing
+from Helpers import hash_file
+from SongCatalog import SongCatalog
+
+STANDINS_DIR = os.path.join(ROOT, "bench", "standins")
+DAT_HEADER = 0x10  # write_pointers puts the .snr at 0x10 of a stream's .dat
+
+def launcher(name, work):
+    # an executable that runs a stand-in with this Python, since BPSS runs YAP and sx directly
+    script = os.path.join(STANDINS_DIR, name + ".py")
+    if os.name == "nt":
+        path = os.path.join(work, name + ".cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{script}" %*\n')
+    else:
+        path = os.path.join(work, name)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+def build_install(path, catalog, vault_mb, stream_kb, seed):
+    # SOUND/BURNOUTGLOBALDATA.BIN holding the vault, and in SOUND/STREAMS a .SNS per
+    # stream plus STREAMHEADERS.BUNDLE with a .dat per stream id, as the stand-in YAP packs them
+    rng = random.Random(seed)
+    streams = os.path.join(path, "SOUND", "STREAMS")
+    os.makedirs(streams)
+    vault_path = os.path.join(path, "vault.tmp")
+    build_vault(vault_path, int(vault_mb * 1024 * 1024), seed, catalog)
+    with zipfile.ZipFile(os.path.join(path, "SOUND", "BURNOUTGLOBALDATA.BIN"), "w") as archive:
+        archive.write(vault_path, "AttribSysVault/vault")
+    os.remove(vault_path)
+
+    with zipfile.ZipFile(os.path.join(streams, "STREAMHEADERS.BUNDLE"), "w") as archive:
+        # a few songs share a stream id
+        for stream_id in sorted({catalog.stream_id(song).upper() for song in catalog.keys}):
+            archive.writestr(f"GenericRwacWaveContent/{stream_id}.dat", rng.randbytes(DAT_HEADER + 32))
+    for song in catalog.keys:
+        with open(os.path.join(streams, catalog.defaults(song)["stream"].upper() + ".SNS"), "wb") as f:
+            f.write(rng.randbytes(stream_kb * 1024))
+
+def digest(path):
+    # one hash over every file under path, to check unapply puts everything back
+    total = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            total.update(os.path.relpath(full, path).encode())
+            total.update(hash_file(full).encode())
+    return total.hexdigest()
+
+def build_soundtrack(path, catalog, songs, source_mb, seed):
+    # the first songs get a source each and new strings wherever they have strings of
+    # their own; the rest keep their defaults
+    rng = random.Random(seed)
+    os.makedirs("sources", exist_ok=True)
+    soundtrack = {}
+    for row, song in enumerate(catalog.keys):
+        strings = dict(catalog.defaults(song))
+        entry = {"strings": strings, "source": ""}
+        if row < songs:
+            for field in ("title", "artist", "album"):
+                if field == "title" or ("read", field) in catalog.layout(song):
+                    strings[field] += " (bench)"
+            source = os.path.abspath(os.path.join("sources", f"song{row:03d}.wav"))
+            with open(source, "wb") as f:
+                f.write(rng.randbytes(int(source_mb * 1024 * 1024)))
+            entry["source"] = source
+            entry["hash"] = hash_file(source)
+        soundtrack[song] = entry
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(soundtrack, f, indent=4)
+    return soundtrack
+
+def check_applied(settings, soundtrack):
+    streams = os.path.join(settings["game"], "SOUND", "STREAMS")
+    for song, entry in soundtrack.items():
+        if not entry["source"]:
+            continue
+        sns = os.path.join(streams, entry["strings"]["stream"].upper() + ".SNS")
+        if hash_file(sns) != entry["hash"] or not os.path.exists(sns + ".old"):
+            raise SystemExit(f"Apply did not install the converted audio for {song}")
+
+def bench_cycles(settings, catalog, songs, args, pristine):
+    results = {}
+    soundtrack_path = os.path.abspath(f"bench-{songs}.soundtrack")
+    soundtrack = build_soundtrack(soundtrack_path, catalog, songs, args.source_mb, args.seed)
+    for cache in ("cold", "warm"):
+        apply_times = []
+        unapply_times = []
+        for _ in range(args.repeat):
+            # cold runs convert everything again; warm runs find it all in the SX cache
+            if cache == "cold":
+                shutil.rmtree(Processing.SX_CACHE_DIR, ignore_errors=True)
+            apply_times.append(timed(Processing.write_pointers, settings, soundtrack_path, "ptrs"))
+            check_applied(settings, soundtrack)
+            unapply_times.append(timed(Processing.reset_files, settings))
+            if digest(settings["game"]) != pristine:
+                raise SystemExit("Unapply left the install different from how it started")
+        results[f"apply {songs} songs {cache}"] = summarize(apply_times)
+        results[f"unapply {songs} songs {cache}"] = summarize(unapply_times)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time full apply and unapply cycles against a fake install, with stand-ins for YAP and sx."
+    )
+    parser.add_argument("--songs", default="1,10,92", help="songs with new audio per cycle, comma separated (default 1,10,92)")
+    parser.add_argument("--repeat", type=int, default=3, help="cycles per configuration (default 3)")
+    parser.add_argument("--source-mb", type=float, default=1.0, help="size of each source file (default 1)")
+    parser.add_argument("--vault-mb", type=float, default=1.0, help="size of the synthetic vault (default 1)")
+    parser.add_argument("--stream-kb", type=int, default=256, help="size of each original .SNS (default 256)")
+    parser.add_argument("--sx-cost", type=float, default=0.25, help="stand-in sx seconds per MB (default 0.25)")
+    parser.add_argument("--yap-cost", type=float, default=0.02, help="stand-in YAP seconds per MB (default 0.02)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="don't write bench/results")
+    args = parser.parse_args()
+    os.environ["BPSS_BENCH_SX_COST"] = str(args.sx_cost)
+    os.environ["BPSS_BENCH_YAP_COST"] = str(args.yap_cost)
+
+    results = {}
+    with work_dir() as work:
+        catalog = SongCatalog.load()
+        game = os.path.join(work, "game")
+        build_install(game, catalog, args.vault_mb, args.stream_kb, args.seed)
+        pristine = digest(game)
+        settings = {"game": game, "yap": launcher("yap", work), "audio": launcher("sx", work)}
+
+        results["load_pointers"] = summarize([timed(Processing.load_pointers, settings, "ptrs")])
+        for songs in args.songs.split(","):
+            results.update(bench_cycles(settings, catalog, min(int(songs), len(catalog)), args, pristine))
+
+    regressed = report(results, latest_results("apply"))
+    if not args.no_save:
+        print(f"\nSaved {save_results('apply', results)}")
+    if regressed:
+        print(f"{len(regressed)} benchmarks are slower than last time.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
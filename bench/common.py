@@ -0,0 +1,86 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+REGRESSION = 1.2    # slower than the last run by this factor counts as a regression
+NOISE_FLOOR = 0.01   # seconds; anything quicker is too noisy to call a regression
+
+@contextmanager
+def work_dir():
+    # BPSS works relative to its current directory, so each benchmark gets a scratch one
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="bpss-bench-")
+    shutil.copy(os.path.join(ROOT, "defaults.json"), path)
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+def summarize(times):
+    return {"min": min(times), "median": statistics.median(times), "runs": len(times)}
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def measure(func, repeat, setup=None, number=1):
+    # times func(*setup()) repeat times, number calls each; returns seconds per call
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        times.append((time.perf_counter() - start) / number)
+    return summarize(times)
+
+def latest_results(kind):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    paths = sorted(name for name in os.listdir(RESULTS_DIR) if name.startswith(kind + "-") and name.endswith(".json"))
+    if not paths:
+        return None
+    with open(os.path.join(RESULTS_DIR, paths[-1]), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_results(kind, results):
+    # bench/results/<kind>-<time>.json; the previous file of the same kind is the baseline
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "when": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=4)
+    return path
+
+def report(results, baseline=None):
+    # prints a table against the baseline and returns the names that regressed
+    previous = baseline["results"] if baseline else {}
+    regressed = []
+    print(f"{'benchmark':<44}{'min':>14}{'median':>14}{'vs last':>10}")
+    for name, timing in results.items():
+        line = f"{name:<44}{timing['min'] * 1000:11.3f} ms{timing['median'] * 1000:11.3f} ms"
+        if name in previous and previous[name]["min"]:
+            ratio = timing["min"] / previous[name]["min"]
+            line += f"{ratio:9.2f}x"
+            if ratio > REGRESSION and timing["min"] > NOISE_FLOOR:
+                line += "  SLOWER"
+                regressed.append(name)
+        print(line)
+    return regressed
@@ -0,0 +1,128 @@
+import argparse
+import os
+import shutil
+import struct
+import sys
+
+from common import work_dir, measure, latest_results, save_results, report
+from vault import build_vault
+
+import Processing
+from HexNavigator import HexNavigator
+from PointerStore import PointerStore
+from SongCatalog import SongCatalog
+from SyncGroups import SyncGroups, FIELD_COLUMNS
+
+FIND_ALL_SAMPLES = 20  # songs whose title pointers find_all looks up per run
+
+def use_vault(vault_path):
+    # stands in for YAP extracting the global data bin: puts the vault where load_pointers looks
+    def extract(command, action, canceled=None):
+        vault_dir = os.path.join(command[3], "AttribSysVault")
+        os.makedirs(vault_dir, exist_ok=True)
+        shutil.copy(vault_path, os.path.join(vault_dir, "vault"))
+    Processing.run_external = extract
+
+def check_sync_groups(store, label):
+    # a cell's sync group has to hold every pointer apply writes it through, or editing
+    # it silently changes a row the table shows as unrelated
+    ptrs = store.songs()
+    songs = list(ptrs)
+    sync = SyncGroups.from_pointers(ptrs)
+    fields = {col: field for field, col in FIELD_COLUMNS.items()}
+    wrong = []
+    for row, song in enumerate(songs):
+        for field, col in FIELD_COLUMNS.items():
+            group = sync.group((row, col)) or [(row, col)]
+            owned = {target for r, c in group for target in ptrs[songs[r]].get("ptrs", {}).get(fields[c], [])}
+            if not set(store.targets(song, field) or []) <= owned:
+                wrong.append(f"{song}:{field}")
+    if wrong:
+        raise SystemExit(f"Sync groups miss pointers apply writes on the generated {label} vault: {', '.join(wrong[:5])}")
+
+def string_table(path):
+    with open(path, "rb") as f:
+        f.seek(0x08)
+        return struct.unpack("<II", f.read(8))
+
+def bench_size(size_mb, repeat, seed):
+    results = {}
+    label = f"{size_mb:g}MB"
+    vault_path = os.path.abspath(f"vault-{label}.bin")
+    expected = build_vault(vault_path, int(size_mb * 1024 * 1024), seed)
+    offset, bin_size = string_table(vault_path)
+    settings = {"game": os.getcwd(), "yap": "YAP"}
+    use_vault(vault_path)
+
+    # the parse has to find exactly what the generator put there, or the timings mean nothing
+    store_name = f"ptrs-{label}"
+    Processing.load_pointers(settings, store_name)
+    found = PointerStore.open(store_name).songs()
+    wrong = [song for song in expected if found.get(song) != expected[song]]
+    if wrong:
+        raise SystemExit(f"load_pointers disagrees with the generated {label} vault on: {', '.join(wrong[:5])}")
+    check_sync_groups(PointerStore.open(store_name), label)
+
+    def read_strings():
+        navigator = HexNavigator(vault_path)
+        navigator.seek(offset)
+        while navigator.loc() < offset + bin_size:
+            navigator.read_cstring()
+        navigator.close()
+    results[f"read_cstring whole table {label}"] = measure(read_strings, repeat)
+
+    navigator = HexNavigator(vault_path)
+    results[f"find marker {label}"] = measure(lambda: navigator.find("NrtP"), repeat, number=1000)
+    results[f"find missing {label}"] = measure(lambda: navigator.find("not in the vault"), repeat, number=10)
+    samples = [expected[song]["locs"]["title"] for song in list(expected)[:FIND_ALL_SAMPLES]]
+    needles = [b"\x03\x00\x01\x00" + struct.pack("<I", loc - offset) for loc in samples]
+
+    def find_all():
+        for needle in needles:
+            navigator.find_all(needle, start=0, hex=True)
+    results[f"find_all x{len(needles)} {label}"] = measure(find_all, repeat)
+    navigator.close()
+
+    results[f"load_pointers {label}"] = measure(lambda: Processing.load_pointers(settings, store_name), repeat)
+
+    # every field of every song changes, which is the most an apply can write
+    catalog = SongCatalog.load()
+    soundtrack = {
+        song: {"strings": {field: f"{value} (edited)" for field, value in catalog.defaults(song).items()}}
+        for song in catalog.keys
+    }
+    store = PointerStore.open(store_name)
+    patch_path = os.path.abspath(f"patch-{label}.bin")
+
+    def fresh_vault():
+        shutil.copy(vault_path, patch_path)
+        return (HexNavigator(patch_path),)
+
+    def patch(navigator):
+        Processing.patch_strings(navigator, offset, soundtrack, store, catalog)
+        navigator.close()
+    results[f"patch_strings all fields {label}"] = measure(patch, repeat, fresh_vault)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the vault parsing and patching hot paths on synthetic vaults.")
+    parser.add_argument("--sizes", default="1,8", help="vault sizes in MB, comma separated (default 1,8)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="don't write bench/results")
+    args = parser.parse_args()
+
+    results = {}
+    with work_dir():
+        for size in args.sizes.split(","):
+            results.update(bench_size(float(size), args.repeat, args.seed))
+
+    regressed = report(results, latest_results("micro"))
+    if not args.no_save:
+        print(f"\nSaved {save_results('micro', results)}")
+    if regressed:
+        print(f"{len(regressed)} benchmarks are slower than last time.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
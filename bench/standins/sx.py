@@ -0,0 +1,39 @@
+import hashlib
+import os
+import struct
+import sys
+import time
+
+# Stand-in for sx. Takes sx's arguments, converts the source (second to last) to
+# <out>.snr and <out>.sns for the last argument, -=<out>, and sleeps for
+# BPSS_BENCH_SX_COST seconds per MB of source. The .sns is the source itself and
+# the .snr a small header naming its size and hash, so results can be checked.
+
+SNR_MAGIC = b"SNR\x00"
+
+def snr_header(data):
+    return SNR_MAGIC + struct.pack("<I", len(data)) + hashlib.sha256(data).digest()[:24]
+
+def main():
+    if len(sys.argv) < 3 or not sys.argv[-1].startswith("-="):
+        print("usage: sx [options] <source> -=<output stem>", file=sys.stderr)
+        return 2
+    source, out = sys.argv[-2], sys.argv[-1][2:]
+    try:
+        with open(source, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"could not read {source}: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Converting {source}")
+    time.sleep(float(os.environ.get("BPSS_BENCH_SX_COST", "0.25")) * len(data) / (1024 * 1024))
+    with open(out + ".sns", "wb") as f:
+        f.write(data)
+    with open(out + ".snr", "wb") as f:
+        f.write(snr_header(data))
+    print("Done")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+import zipfile
+
+# Stand-in for YAP. "e <bundle> <dir>" extracts a bundle into dir and "c <dir> <bundle>"
+# packs dir back into one. Bundles are stored zips, and every run sleeps for
+# BPSS_BENCH_YAP_OVERHEAD seconds plus BPSS_BENCH_YAP_COST seconds per MB handled.
+
+def simulate_cost(size):
+    overhead = float(os.environ.get("BPSS_BENCH_YAP_OVERHEAD", "0.05"))
+    per_mb = float(os.environ.get("BPSS_BENCH_YAP_COST", "0.02"))
+    time.sleep(overhead + per_mb * size / (1024 * 1024))
+
+def extract(bundle, out_dir):
+    with zipfile.ZipFile(bundle, "r") as archive:
+        archive.extractall(out_dir)
+    simulate_cost(os.path.getsize(bundle))
+
+def pack(in_dir, bundle):
+    with zipfile.ZipFile(bundle, "w", zipfile.ZIP_STORED) as archive:
+        for dirpath, _, filenames in os.walk(in_dir):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                archive.write(path, os.path.relpath(path, in_dir).replace(os.sep, "/"))
+    simulate_cost(os.path.getsize(bundle))
+
+def main():
+    if len(sys.argv) != 4 or sys.argv[1] not in ("e", "c"):
+        print("usage: yap e <bundle> <dir> | yap c <dir> <bundle>", file=sys.stderr)
+        return 2
+    command, source, dest = sys.argv[1:]
+    if not os.path.exists(source):
+        print(f"{source} not found", file=sys.stderr)
+        return 1
+    print(f"{'Extracting' if command == 'e' else 'Packing'} {source}")
+    (extract if command == "e" else pack)(source, dest)
+    print("Done")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
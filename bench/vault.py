@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from SongCatalog import SongCatalog
+from PointerStore import FIELDS
+
+HEADER_SIZE = 0x10
+MARKER = b"NrtP"
+POINTER_PREFIX = b"\x03\x00\x01\x00"
+OPTIONAL_KEPT = 0.6      # how often an optional field still has its own string
+STRING_SHARE = 0.25      # share of the padding that goes to filler strings
+FILLER_REFERENCED = 0.5  # how often a filler string has pointer records of its own
+# maps every byte into 0x40-0xff, so opaque bytes never look like a record or a string end
+OPAQUE = bytes(0x40 + b % 0xc0 for b in range(256))
+
+def build_vault(path, size=0, seed=0, catalog=None):
+    """Writes a synthetic AttribSysVault to path and returns what load_pointers should find in it.
+
+    The file has the layout load_pointers and write_pointers rely on: a header whose
+    uint32s at 0x08 and 0x0c give the offset and size of the string table, an NrtP
+    marker, pointer records (03 00 01 00 then the uint32 offset of a string within
+    the table) and the string table last, so written strings can be appended.
+    Every song in the catalog is laid out as its type and lock say, with 1-3 pointer
+    records per string. Filler strings and opaque bytes pad the file out to roughly
+    size bytes. The same seed always gives the same file.
+
+    The return value has the shape load_pointers stores: song -> {"strings", "locs",
+    "ptrs"}, with absolute file positions.
+    """
+    catalog = catalog or SongCatalog.load(os.path.join(ROOT, "defaults.json"))
+    rng = random.Random(seed)
+    strings = bytearray()
+    referenced = []  # string table offsets that get pointer records
+    filler = 0
+
+    def put(value):
+        pos = len(strings)
+        strings.extend(value.encode("ascii", "replace") + b"\x00")
+        return pos
+
+    # filler strings go in the gaps between songs, like the vault's other attributes
+    gap_size = size * STRING_SHARE / (len(catalog) + 1)
+
+    def pad_strings():
+        nonlocal filler
+        end = len(strings) + gap_size
+        while len(strings) < end:
+            pos = put(f"filler_{filler:06d}")
+            filler += 1
+            if rng.random() < FILLER_REFERENCED:
+                referenced.append(pos)
+
+    expected = {}
+    for song in catalog.keys:
+        pad_strings()
+        default = catalog.defaults(song)
+        locs = {"title": put(song)}
+        found = {"title": song}
+        referenced.append(locs["title"])
+        for step in catalog.layout(song):
+            match step:
+                case ("read", field):
+                    locs[field] = put(default[field])
+                    referenced.append(locs[field])
+                case ("alias", field, other):
+                    locs[field] = locs[other]
+                case ("optional", field):
+                    if rng.random() < OPTIONAL_KEPT:
+                        locs[field] = put(default[field])
+                        referenced.append(locs[field])
+                    else:
+                        locs[field] = None
+            found[field] = default[field]
+        expected[song] = (found, locs)
+    pad_strings()
+
+    # pointer records in random order, spread through opaque bytes up to the wanted size
+    records = [rel for rel in referenced for _ in range(rng.randint(1, 3))]
+    rng.shuffle(records)
+    opaque = max(0, size - HEADER_SIZE - len(MARKER) - len(strings) - len(records) * 8)
+    padding = opaque / (len(records) or 1)
+    region = bytearray(MARKER)
+    pointers = {}  # string table offset -> pointer locations
+    for rel in records:
+        region.extend(rng.randbytes(int(rng.uniform(0, 2 * padding))).translate(OPAQUE))
+        region.extend(POINTER_PREFIX)
+        pointers.setdefault(rel, []).append(HEADER_SIZE + len(region))
+        region.extend(struct.pack("<I", rel))
+
+    offset = HEADER_SIZE + len(region)
+    header = bytearray(b"Vlt\x00\x01\x00\x00\x00")
+    header.extend(struct.pack("<II", offset, len(strings)))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(region)
+        f.write(strings)
+
+    out = {}
+    for song, (found, locs) in expected.items():
+        out[song] = {
+            "strings": {field: found[field] for field in FIELDS},
+            "locs": {field: 0 if locs[field] is None else offset + locs[field] for field in FIELDS},
+            "ptrs": {field: [] if locs[field] is None else sorted(pointers[locs[field]]) for field in FIELDS},
+        }
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic AttribSysVault.")
+    parser.add_argument("path")
+    parser.add_argument("--size", type=float, default=1.0, help="approximate size in MB (default 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    songs = build_vault(args.path, int(args.size * 1024 * 1024), args.seed)
+    print(f"{args.path}: {os.path.getsize(args.path)} bytes, {len(songs)} songs")
+
+if __name__ == "__main__":
+    main()
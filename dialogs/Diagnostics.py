@@ -0,0 +1,148 @@
+import json
+import os
+import pstats
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPlainTextEdit, QPushButton
+from PyQt5.QtGui import QIcon, QFontDatabase, QDesktopServices
+from PyQt5.QtCore import Qt, QUrl
+
+from Helpers import resource_path
+from Processing import SX_CACHE_DIR
+from Tracing import TRACES_DIR
+
+HOT_FUNCTIONS = 15
+
+def list_runs():
+    # trace files, newest first
+    if not os.path.isdir(TRACES_DIR):
+        return []
+    paths = [os.path.join(TRACES_DIR, name) for name in os.listdir(TRACES_DIR) if name.endswith(".json")]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+def cache_stats():
+    entries = 0
+    size = 0
+    if os.path.isdir(SX_CACHE_DIR):
+        for name in os.listdir(SX_CACHE_DIR):
+            size += os.path.getsize(os.path.join(SX_CACHE_DIR, name))
+            if name.endswith(".snr"):
+                entries += 1
+    return entries, size
+
+def ms(us):
+    return f"{us / 1000:10.1f} ms"
+
+def mb(n):
+    return f"{n / (1024 * 1024):8.1f} MB"
+
+def hot_functions(prof_path):
+    stats = pstats.Stats(prof_path).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:HOT_FUNCTIONS]
+    lines = [f"{'own':>10}  {'total':>10}  {'calls':>8}  function"]
+    for (filename, line, name), (_, calls, own, total, _) in rows:
+        # built-ins have no file of their own
+        where = f" ({os.path.basename(filename)}:{line})" if filename != "~" else ""
+        lines.append(f"{own * 1000:7.1f} ms  {total * 1000:7.1f} ms  {calls:8}  {name}{where}")
+    return lines
+
+def run_report(trace_path):
+    with open(trace_path, "r", encoding="utf-8") as f:
+        events = [event for event in json.load(f)["traceEvents"] if event.get("ph") == "X"]
+
+    lines = ["Stages"]
+    for event in events:
+        if event["cat"] in ("job", "run", "stage"):
+            args = event["args"]
+            indent = {"job": "", "run": "  "}.get(event["cat"], "    ")
+            lines.append(
+                f"  {indent}{event['name']:<{36 - len(indent)}}{ms(event['dur'])}  cpu {args['cpu_ms']:9.1f} ms"
+                f"  read {mb(args['read_bytes'])}  written {mb(args['write_bytes'])}"
+            )
+    installs = [event for event in events if event["cat"] == "install"]
+    if installs:
+        lines.append(f"    {len(installs)} files installed or restored{ms(sum(event['dur'] for event in installs))}")
+    peak = max((event["args"]["peak_rss"] for event in events), default=0)
+    lines.append(f"  peak memory {mb(peak)}")
+
+    lines += ["", "Subprocesses"]
+    subprocesses = [event for event in events if event["cat"] == "subprocess"]
+    for event in subprocesses:
+        args = event["args"]
+        label = event["name"] + (f" {args['source']}" if "source" in args else "")
+        exit_code = "canceled" if args.get("canceled") else args.get("returncode", "-")
+        lines.append(
+            f"  {label:<50}{ms(event['dur'])}  cpu {args.get('user_ms', 0) + args.get('sys_ms', 0):9.1f} ms"
+            f"  peak {mb(args.get('max_rss', 0))}  exit {exit_code}"
+        )
+        for line in args.get("stderr", "").splitlines():
+            lines.append(f"      {line}")
+    if not subprocesses:
+        lines.append("  none")
+
+    lookups = [event for event in events if event["cat"] == "cache"]
+    hits = sum(1 for event in lookups if event["args"].get("hit"))
+    entries, size = cache_stats()
+    lines += [
+        "", "SX cache",
+        f"  {hits} hits, {len(lookups) - hits} misses this run",
+        f"  {entries} converted songs on disk, {mb(size).strip()}",
+    ]
+
+    prof_path = os.path.splitext(trace_path)[0] + ".prof"
+    lines += ["", "Hottest functions"]
+    if os.path.exists(prof_path):
+        # the job's pool threads are in the profile too, so times can add up past the wall time
+        lines.append("  job thread and its worker pools combined")
+        lines += ["  " + line for line in hot_functions(prof_path)]
+    else:
+        lines.append("  not profiled; turn on profiling in Settings or start BPSS with --profile")
+    return "\n".join(lines)
+
+class DiagnosticsDialog(QDialog):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Diagnostics")
+        self.setWindowIcon(QIcon(resource_path("media/bpss.png")))
+        self.resize(760, 520)
+
+        layout = QVBoxLayout()
+
+        run_layout = QHBoxLayout()
+        run_layout.addWidget(QLabel("Run"))
+        self.runs = QComboBox()
+        self.paths = list_runs()
+        self.runs.addItems([os.path.splitext(os.path.basename(path))[0] for path in self.paths])
+        self.runs.currentIndexChanged.connect(self.show_run)
+        run_layout.addWidget(self.runs, 1)
+        layout.addLayout(run_layout)
+
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.report.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.report, 1)
+
+        button_layout = QHBoxLayout()
+        folder_button = QPushButton("Open Traces Folder")
+        folder_button.clicked.connect(self.open_folder)
+        button_layout.addWidget(folder_button)
+        button_layout.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button, alignment=Qt.AlignRight)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.show_run(0)
+
+    def show_run(self, index):
+        if not self.paths:
+            self.report.setPlainText("Nothing recorded yet. Every load, apply and export leaves a trace here.")
+            return
+        try:
+            self.report.setPlainText(run_report(self.paths[index]))
+        except Exception as e:
+            self.report.setPlainText(f"Could not read {self.paths[index]}: {e}")
+
+    def open_folder(self):
+        os.makedirs(TRACES_DIR, exist_ok=True)
+        QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath(TRACES_DIR)))
@@ -1,9 +1,12 @@
-import json
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QComboBox, QDialogButtonBox, QApplication
 )
 from PyQt5.QtGui import QPixmap, QIcon
 from Helpers import col_to_key, resource_path
+from PointerStore import PointerStore
+from Logs import get_logger
+
+log = get_logger("disambiguate")
 
 class DisambiguateDialog(QDialog):
     def __init__(self, hash, key, col, parent=None):
@@ -35,36 +38,15 @@ class DisambiguateDialog(QDialog):
 
     def load_ptrs(self):
         try:
-            filename = self.hash + ".json"
-            with open(filename, "r") as file:
-                self.ptrs = json.load(file)
-        except FileNotFoundError:
-            print(f"Error: {self.file} file not found.")
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in {self.file}.")
+            self.store = PointerStore.open(self.hash)
         except Exception as e:
-            print(f"Error loading data: {e}")
-
-    def write_ptrs(self):
-        filename = self.hash + ".json"
-        with open(filename, "w", encoding="utf-8") as file:
-            json.dump(self.ptrs, file, indent=2)
+            log.error("Error loading pointers: %s", e)
 
     def create_dropdown(self):
         dropdown = QComboBox()
         
-        # get options from file
-        col = col_to_key(self.col)
-        options = self.ptrs[self.key]["ptrs"][col]
-        if len(options) <= 1:
-            # look elsewhere
-            print("your pointers are in another castle...")
-            s = self.ptrs[self.key]["strings"][col]
-            candidates = [a["ptrs"][col] for a in self.ptrs.values() 
-              if "strings" in a and col in a["strings"] 
-              and a["strings"][col] == s]
-            options = [o for o in candidates if len(o) > 1][0]
-            print(str(options))
+        # get options from the pointer store, which looks elsewhere if the string is shared
+        options = self.store.candidates(self.key, col_to_key(self.col))
         
         options = [str(i) for i in options]
         dropdown.addItems(options)
@@ -74,12 +56,6 @@ class DisambiguateDialog(QDialog):
         return int(self.dropdown.currentText())
 
     def save_and_accept(self):
-        # write the override to data
-        if self.ptrs[self.key].get("overrides"):
-            self.ptrs[self.key]["overrides"][col_to_key(self.col)] = self.selected_option()
-        else:
-            self.ptrs[self.key]["overrides"] = {}
-            self.ptrs[self.key]["overrides"][col_to_key(self.col)] = self.selected_option()
-        # save it to file
-        self.write_ptrs()
-        self.accept()
\ No newline at end of file
+        # write the override to data, the store saves it to file
+        self.store.set_override(self.key, col_to_key(self.col), self.selected_option())
+        self.accept()
@@ -18,7 +18,7 @@ class SettingsDialog(QDialog):
         window_title = "First Time Setup" if first else "Settings"
         self.setWindowTitle(window_title)
         self.setWindowIcon(QIcon(resource_path("media/bpss.png")))
-        self.setFixedSize(450, 250)
+        self.setFixedSize(450, 300)
         self.settings = self.load_settings()
         self.init_ui()
 
@@ -33,15 +33,23 @@ class SettingsDialog(QDialog):
         self.warn_disambiguation_checkbox.setChecked(self.settings.get("warn", True))
         self.cut_songs_checkbox = QCheckBox("Use Cut Songs in BPR Mod")
         self.cut_songs_checkbox.setChecked(self.settings.get("mod", False))
+        self.embed_checkbox = QCheckBox("Include converted audio in exported zips")
+        self.embed_checkbox.setChecked(self.settings.get("embed", False))
+        self.profile_checkbox = QCheckBox("Profile the next load, apply or export (see Diagnostics)")
+        self.profile_checkbox.setChecked(self.settings.get("profile", False))
         if self.first:
             self.warn_disambiguation_checkbox.hide()
             self.cut_songs_checkbox.hide()
+            self.embed_checkbox.hide()
+            self.profile_checkbox.hide()
         else:
             self.clear_cache_button = QPushButton("Clear SX Cache")
             self.clear_cache_button.setFixedWidth(120)
             self.clear_cache_button.clicked.connect(self.clear_sx_cache)
         layout.addWidget(self.warn_disambiguation_checkbox)
         layout.addWidget(self.cut_songs_checkbox)
+        layout.addWidget(self.embed_checkbox)
+        layout.addWidget(self.profile_checkbox)
         if not self.first:
             button_layout = QHBoxLayout()
             button_layout.addStretch()
@@ -112,6 +120,8 @@ class SettingsDialog(QDialog):
                 settings["warn"] = coerce_bool(settings.get("warn", True), default=True)
                 settings["mod"] = coerce_bool(settings.get("mod", False), default=False)
                 settings["actions"] = coerce_bool(settings.get("actions", False), default=False)
+                settings["embed"] = coerce_bool(settings.get("embed", False), default=False)
+                settings["profile"] = coerce_bool(settings.get("profile", False), default=False)
                 return settings
         return {}
 
@@ -142,7 +152,9 @@ class SettingsDialog(QDialog):
             "audio": self.audio_input.text(),
             "yap": self.yap_input.text(),
             "warn": self.warn_disambiguation_checkbox.isChecked(),
-            "mod": self.cut_songs_checkbox.isChecked()
+            "mod": self.cut_songs_checkbox.isChecked(),
+            "embed": self.embed_checkbox.isChecked(),
+            "profile": self.profile_checkbox.isChecked()
         }
 
         missing = [key for key, val in required_fields.items() if val is None]
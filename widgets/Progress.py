@@ -1,13 +1,24 @@
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QProgressBar, QLabel, QDialog
+import time
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QProgressBar, QLabel, QDialog
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from Helpers import resource_path
 
+def format_eta(seconds):
+    if seconds < 10:
+        return "Almost done"
+    if seconds < 60:
+        return f"About {int(seconds // 5 * 5)} s left"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes >= 10 or seconds < 10:
+        return f"About {minutes} min left"
+    return f"About {minutes} min {seconds // 10 * 10} s left"
+
 class ProgressWidget(QDialog):
     def __init__(self, text):
         super().__init__()
         self.setWindowTitle(text)
-        self.setFixedSize(400, 100)
+        self.setFixedSize(400, 120)
         self.setWindowIcon(QIcon(resource_path("media/bpss.png")))
         self.setWindowModality(Qt.ApplicationModal)
 
@@ -17,11 +28,19 @@ class ProgressWidget(QDialog):
         self.progress.setMinimum(0)
         self.progress.setMaximum(100)
         self.progress.setValue(0)
+        self.eta_label = QLabel("", self)
+
+        # the estimate counts down between updates from the job
+        self.finish_at = None
+        self.eta_timer = QTimer(self)
+        self.eta_timer.setInterval(1000)
+        self.eta_timer.timeout.connect(self.show_eta)
 
         # Layout
         layout = QVBoxLayout()
         layout.addWidget(self.status_label, 1)
         layout.addWidget(self.progress, 3)
+        layout.addWidget(self.eta_label, 1)
         layout.addStretch(1)
         self.setLayout(layout)
 
@@ -31,11 +50,26 @@ class ProgressWidget(QDialog):
         if status:
             self.status_label.setText(status)
         self.progress.show()
-        QApplication.processEvents()
+
+    def set_eta(self, seconds):
+        # seconds left, or -1 if there is no estimate
+        if seconds < 0:
+            self.finish_at = None
+            self.eta_timer.stop()
+        else:
+            self.finish_at = time.monotonic() + seconds
+            self.eta_timer.start()
+        self.show_eta()
+
+    def show_eta(self):
+        if self.finish_at is None:
+            self.eta_label.setText("")
+        else:
+            self.eta_label.setText(format_eta(max(0, self.finish_at - time.monotonic())))
 
     def closeEvent(self, event):
-        if hasattr(self, 'worker_thread') and self.worker_thread and self.worker_thread.isRunning():
-            self.worker_thread.requestInterruption()
+        if hasattr(self, 'job') and self.job and self.job.is_running():
+            self.job.cancel()
             event.ignore()
         else:
             event.accept()
\ No newline at end of file
@@ -0,0 +1,80 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem, QStyle, QApplication, QFileDialog
+from PyQt5.QtGui import QPixmap, QIcon, QColor, QPalette
+from PyQt5.QtCore import Qt, QEvent, QRect, QSize
+from Helpers import resource_path
+from widgets.SongTableModel import SOURCE_COLUMN, LOCKED_COLOR
+
+LOCKED_SELECTED_COLOR = "#a0c4ff"
+ICON_SIZE = 12
+
+_pixmaps = {}
+
+def cached_pixmap(path, size=None):
+    # Pixmaps are loaded and scaled once and shared by every cell
+    key = (path, size)
+    if key not in _pixmaps:
+        pixmap = QPixmap(resource_path(path))
+        if size:
+            pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        _pixmaps[key] = pixmap
+    return _pixmaps[key]
+
+class SongCellDelegate(QStyledItemDelegate):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.star_icon = QIcon(cached_pixmap("media/star.png"))
+        self.browse_icon = QIcon(cached_pixmap("media/browse.png", ICON_SIZE))
+        self.lock_pixmap = cached_pixmap("media/lock.png", ICON_SIZE)
+        self.locked_color = QColor(LOCKED_COLOR)
+        self.locked_selected_color = QColor(LOCKED_SELECTED_COLOR)
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        cell = index.model().cell(index.row(), index.column())
+        if cell.disambiguated:
+            option.icon = self.star_icon
+        elif index.column() == SOURCE_COLUMN:
+            option.icon = self.browse_icon
+            option.decorationSize = QSize(ICON_SIZE, ICON_SIZE)
+        else:
+            return
+        option.features |= QStyleOptionViewItem.HasDecoration
+
+    def paint(self, painter, option, index):
+        cell = index.model().cell(index.row(), index.column())
+        if not cell.locked or cell.disambiguated:
+            super().paint(painter, option, index)
+            return
+
+        # locked cells: flat grey (light blue when selected), disabled text, lock on the right
+        painter.save()
+        selected = option.state & QStyle.State_Selected
+        painter.fillRect(option.rect, self.locked_selected_color if selected else self.locked_color)
+        text_rect = option.rect.adjusted(4, 0, -(ICON_SIZE + 8), 0)
+        painter.setPen(option.palette.color(QPalette.Disabled, QPalette.Text))
+        text = option.fontMetrics.elidedText(str(cell.text), Qt.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, text)
+        lock_rect = QRect(0, 0, ICON_SIZE, ICON_SIZE)
+        lock_rect.moveCenter(option.rect.center())
+        lock_rect.moveRight(option.rect.right() - 4)
+        painter.drawPixmap(lock_rect, self.lock_pixmap)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        # clicking the browse icon of a source cell opens a file picker
+        if index.column() == SOURCE_COLUMN and event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            opt = QStyleOptionViewItem(option)
+            self.initStyleOption(opt, index)
+            style = opt.widget.style() if opt.widget else QApplication.style()
+            icon_rect = style.subElementRect(QStyle.SE_ItemViewItemDecoration, opt, opt.widget)
+            if icon_rect.contains(event.pos()):
+                file_path, _ = QFileDialog.getOpenFileName(
+                    self.parent(),
+                    "Select File",
+                    "",
+                    "Audio Files (*.wav *.mp3 *.aiff)"
+                )
+                if file_path:
+                    model.setData(index, file_path)
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,160 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+
+HEADERS = ["#", "Title", "Album", "Artist", "Stream", "Source"]
+SOURCE_COLUMN = 5
+LOCKED_COLOR = "#eeeeee"
+SYNC_COLORS = [
+    "#A8E6A1",  # pastel forest green (replacing pastel red)
+    "#FFDFBA",  # pastel orange
+    "#FFFFBA",  # pastel yellow
+    "#BAFFC9",  # pastel green
+    "#BAE1FF",  # pastel blue
+    "#E3BAFF",  # pastel purple
+    "#FFCCE5",  # pastel pink
+    "#CCFFEE",  # mint
+    "#FFD0AA",  # pastel peach
+    "#FFF0BA",  # light gold
+    "#FFD1DC",  # cotton candy pink
+    "#C5E1A5",  # light lime
+    "#F8BBD0",  # light rose
+    "#D1C4E9",  # lavender
+    "#B3E5FC"   # baby blue
+]
+
+class Cell:
+    def __init__(self, text="", locked=False, color=None, override=None):
+        self.text = text
+        self.locked = locked      # shares its string with another field, not editable
+        self.color = color        # sync group color, if the string is shared with other cells
+        self.override = override  # pointer chosen when the cell was disambiguated
+        self.inner = None         # value a locked cell carries along when songs are moved
+        self.locked_text = text if locked and override is not None else None  # text to restore when un-disambiguated
+
+    @property
+    def disambiguated(self):
+        return self.override is not None
+
+    @property
+    def editable(self):
+        return not self.locked or self.disambiguated
+
+class SongTableModel(QAbstractTableModel):
+    # Mirrors QTableWidget.itemChanged: fires for any text change of an editable cell
+    itemChanged = pyqtSignal(int, int, str)
+    # Only fires when the user picks, drops or types a source file
+    sourceChanged = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.brushes = [QBrush(QColor(c)) for c in SYNC_COLORS]
+        self.locked_brush = QBrush(QColor(LOCKED_COLOR))
+
+    def set_cells(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def cell(self, row, col):
+        return self.rows[row][col]
+
+    def text(self, row, col):
+        return str(self.rows[row][col].text)
+
+    def set_text(self, row, col, text):
+        cell = self.rows[row][col]
+        if cell.text == text:
+            return
+        cell.text = text
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        if cell.editable and 0 < col < SOURCE_COLUMN:
+            self.itemChanged.emit(row, col, text)
+
+    def set_override(self, row, col, override):
+        cell = self.rows[row][col]
+        if cell.locked:
+            if override is not None and not cell.disambiguated:
+                cell.locked_text = cell.text
+            elif override is None and cell.locked_text is not None:
+                cell.text = cell.locked_text
+                cell.locked_text = None
+        cell.override = override
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index)
+
+    def set_sync(self, sync, overrides):
+        # pointer-derived state can arrive after the text, so keep whatever is shown
+        for row, cells in enumerate(self.rows):
+            for col in range(1, SOURCE_COLUMN - 1):
+                cell = cells[col]
+                cell.locked = sync.is_locked((row, col))
+                cell.color = sync.color((row, col))
+                cell.override = overrides[row].get(HEADERS[col].lower())
+                cell.locked_text = cell.text if cell.locked and cell.override is not None else None
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(HEADERS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() == SOURCE_COLUMN:
+            flags |= Qt.ItemIsDropEnabled
+        if index.column() > 0 and self.rows[index.row()][index.column()].editable:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        cell = self.rows[index.row()][index.column()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return cell.text
+        if role == Qt.BackgroundRole:
+            if cell.disambiguated:
+                return None
+            if cell.locked:
+                return self.locked_brush
+            if cell.color is not None:
+                return self.brushes[cell.color % len(self.brushes)]
+        if role == Qt.ToolTipRole and cell.disambiguated:
+            return str(cell.override)
+        if role == Qt.TextAlignmentRole and index.column() == 0:
+            return Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self.set_text(index.row(), index.column(), value)
+        if index.column() == SOURCE_COLUMN:
+            self.sourceChanged.emit(index.row(), value)
+        return True
+
+    # Dropping a file on a source cell picks it as that song's source
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def supportedDropActions(self):
+        return Qt.CopyAction | Qt.LinkAction
+
+    def canDropMimeData(self, data, action, row, column, parent):
+        return data.hasUrls() and parent.isValid() and parent.column() == SOURCE_COLUMN
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if not self.canDropMimeData(data, action, row, column, parent):
+            return False
+        return self.setData(parent, data.urls()[0].toLocalFile())